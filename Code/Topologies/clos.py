@@ -0,0 +1,89 @@
+from .topology import Topology
+from .util import gen_graph_from_edges, preprocess_node_positions
+from .wiring import layer_ranges
+import numpy as np
+
+class Clos(Topology):
+    """ Generic layered (Clos-like) topology built from a declarative description
+
+    The switches are described by a list of Layer objects (bottom layer first) and connected by a list of
+    WiringRule objects, see wiring.py. E.g. a leaf-spine topology with 32 leaves and 8 spines:
+
+        Clos([Layer("tor", 32), Layer("spine", 8)], [FullBipartite("tor", "spine")], "LeafSpine_32_8")
+    """
+
+    # gen_graph() is built from gen_edges()
+    graph_from_edges = True
+
+    def __init__(self, layers, rules, descriptor="Clos", capacity_function=None):
+        """
+
+        Raises a ValueError if there are no or more than 4 layers (the drawing supports up to 4 layers).
+        :param layers: A list of Layer objects, bottom (ToR) layer first
+        :param rules: A list of WiringRule objects connecting the layers
+        :param descriptor (optional, defaults to "Clos"): String describing the architecture for convenient file creation & naming
+        :param capacity_function (optional, defaults to None): Function used to initialise link capacities based on their endpoints.
+        """
+
+        if len(layers) < 1 or len(layers) > 4:
+            raise ValueError("A Clos topology needs between 1 and 4 layers!")
+        self.layers = layers
+        self.rules = rules
+        indices = layer_ranges(layers)
+        # Expose the switch ID ranges as <name>_idx_range like the other topologies
+        for layer, idx_range in zip(layers, indices):
+            setattr(self, layer.name + "_idx_range", idx_range)
+        super().__init__(indices, descriptor, capacity_function)
+
+    @classmethod
+    def from_topology(cls, topology):
+        """Re-express a topology providing a clos_spec() through the builder.
+
+        Raises a ValueError if the topology has no declarative description.
+        :param topology: The topology object to rebuild
+        :return: A Clos object with the same switch IDs and links
+        """
+
+        spec = topology.clos_spec()
+        if spec is None:
+            raise ValueError("%s can't be described by layers and wiring rules" % topology.descriptor)
+        layers, rules = spec
+        return cls(layers, rules, topology.descriptor, topology.capacity_function)
+
+    def clos_spec(self):
+        return self.layers, self.rules
+
+    def gen_graph(self):
+        """Constructs a Networkx Graph from the layers and wiring rules
+
+        :return: A networkx DiGraph of the topology
+        """
+
+        # Adding nodes and links (in both directions)
+        G = gen_graph_from_edges(self.gen_edges(), *[layer.switch_count for layer in self.layers])
+
+        # Initialize Capacities
+        G = self.init_capacities(G)
+
+        return G
+
+    def set_node_positions(self):
+        """Compute the x-axis coordinate of nodes for later drawing.
+
+        :return: A 2-dimentional array representing the node positions. (horizontal pos, layer)
+        """
+
+        node_width, node_gap, position = preprocess_node_positions(self)
+        pos_step = node_width + node_gap
+
+        # Spread every layer evenly, with extra spacing of 2 between groups, and center it above the widest layer
+        widths = []
+        for layer in self.layers:
+            groups = layer.switch_count // layer.group_size
+            widths.append(layer.switch_count * pos_step + (groups - 1) * 2)
+        for i, layer in enumerate(self.layers):
+            idx = np.arange(layer.switch_count)
+            shift = (max(widths) - widths[i]) / 2.0
+            position[i, 0:layer.switch_count] = node_width * 0.5 + idx * pos_step + layer.groups(idx) * 2 + shift
+
+        return position
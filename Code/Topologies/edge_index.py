@@ -0,0 +1,131 @@
+import numpy as np
+from .topology import FingerprintCache
+
+#####              #####
+####                ####
+###    Edge index    ###
+####                ####
+#####              #####
+
+# Every link gets a dense, stable ID: its row in Topology.gen_edges() (sorted by smaller and then larger switch ID),
+# and the direction v -> u of link e is the directed link e + E, the order of Topology.gen_links(). Per-link state
+# (bytes, drops, queue depths, ...) can then live in flat numpy arrays indexed by link ID.
+# Since the rows are sorted, the links of switch u to higher IDs are the contiguous block rowptr[u] ... rowptr[u + 1]
+# and edge_id(u, v) = rowptr[u] + rank of v inside that block, found by bisecting the block (at most the port count of
+# the switch, so a handful of comparisons). No hash table or per-link dict is involved.
+
+class EdgeIndex:
+    """Arithmetic mapping between switch ID pairs and link IDs"""
+
+    def __init__(self, topology):
+        """
+
+        :param topology: The topology object to index
+        """
+
+        self.edges = topology.gen_edges()
+        self.edge_count = len(self.edges)
+        self.first_id = topology.indices[0][0]
+        last_id = topology.indices[-1][-1]
+        # rowptr[i] is the first link whose smaller end is switch ID i + first ID
+        self.rowptr = np.searchsorted(self.edges[:, 0], np.arange(self.first_id, last_id + 2))
+        self.max_row = int(np.diff(self.rowptr).max(initial=0))
+
+    def edge_ids(self, u, v):
+        """Vectorized edge_id(): IDs of the links between pairs of switches, in any direction.
+
+        :param u: Array of switch IDs
+        :param v: Array of switch IDs
+        :return: An int64 array of link IDs (rows of Topology.gen_edges()), -1 where the switches aren't linked
+        """
+
+        u = np.asarray(u, dtype=np.int64)
+        v = np.asarray(v, dtype=np.int64)
+        low = np.minimum(u, v) - self.first_id
+        high = np.maximum(u, v)
+        valid = (low >= 0) & (low < len(self.rowptr) - 1)
+        row = np.where(valid, low, 0)
+        start = self.rowptr[row]
+        end = np.where(valid, self.rowptr[row + 1], start)
+        # Bisect all rows at once: first position in [start, end) holding a neighbour >= high
+        lo, hi = start.copy(), end.copy()
+        for _ in range(self.max_row.bit_length()):
+            searching = lo < hi
+            middle = (lo + hi) // 2
+            smaller = searching & (self.edges[np.minimum(middle, self.edge_count - 1), 1] < high)
+            lo = np.where(smaller, middle + 1, lo)
+            hi = np.where(searching & ~smaller, middle, hi)
+        found = (lo < end) & (self.edges[np.minimum(lo, self.edge_count - 1), 1] == high)
+        return np.where(found, lo, -1)
+
+    def edge_id(self, u, v):
+        """ID of the link between two switches, in any direction.
+
+        Raises a ValueError if the switches aren't linked.
+        :param u: ID of a switch
+        :param v: ID of a switch
+        :return: The link ID (row of Topology.gen_edges())
+        """
+
+        low, high = (u, v) if u < v else (v, u)
+        if self.first_id <= low < self.first_id + len(self.rowptr) - 1:
+            start = self.rowptr[low - self.first_id]
+            row = self.edges[start:self.rowptr[low - self.first_id + 1], 1]
+            rank = row.searchsorted(high)
+            if rank < len(row) and row[rank] == high:
+                return int(start + rank)
+        raise ValueError("There is no link between %d and %d" % (u, v))
+
+    def link_ids(self, u, v):
+        """IDs of directed links u -> v, in the order of Topology.gen_links() (link e + E is the reverse of link e).
+
+        :param u: Array of source switch IDs
+        :param v: Array of destination switch IDs
+        :return: An int64 array of directed link IDs, -1 where the switches aren't linked
+        """
+
+        eid = self.edge_ids(u, v)
+        reverse = np.asarray(u) > np.asarray(v)
+        return np.where((eid >= 0) & reverse, eid + self.edge_count, eid)
+
+    def edge_endpoints(self, eid):
+        """Inverse of edge_id().
+
+        :param eid: A link ID or an array of link IDs
+        :return: The two switch IDs (smaller first) as an array of shape (2,) or (len(eid), 2)
+        """
+        return self.edges[eid]
+
+    def link_endpoints(self, lid):
+        """Inverse of link_ids().
+
+        :param lid: A directed link ID or an array of directed link IDs
+        :return: The (source, destination) switch IDs as an array of shape (2,) or (len(lid), 2)
+        """
+
+        lid = np.asarray(lid)
+        endpoints = self.edges[lid % self.edge_count]
+        return np.where((lid >= self.edge_count)[..., np.newaxis], endpoints[..., ::-1], endpoints)
+
+    def counters(self, dtype=np.int64, directed=True):
+        """Zeroed flat array for per-link state.
+
+        :param dtype (optional, defaults to int64): Data type of the counters
+        :param directed (optional, defaults to True): One counter per direction (indexed by link_ids()) or per link (indexed by edge_ids())
+        :return: A numpy array of 2E or E zeros
+        """
+        return np.zeros(2 * self.edge_count if directed else self.edge_count, dtype=dtype)
+
+
+# Indexes are built once per topology, keyed by fingerprint
+_index_cache = FingerprintCache()
+
+
+def edge_index(topology):
+    """The edge index of a topology, built on first use and shared by structurally identical topologies.
+
+    :param topology: The topology object
+    :return: An EdgeIndex
+    """
+
+    return _index_cache.get(topology, lambda: EdgeIndex(topology))
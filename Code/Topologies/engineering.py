@@ -0,0 +1,308 @@
+import numpy as np
+from .topology import Topology
+from .util import gen_graph_from_edges
+
+#####                        #####
+####                          ####
+###    Topology engineering    ###
+####                          ####
+#####                        #####
+
+# Instead of going through spine blocks, the middle blocks of the aggregation blocks (ABs) are wired directly to each
+# other through optical circuit switches, and the number of circuits between two ABs follows the traffic:
+#   1. every pair of ABs keeps min_links circuits, so the fabric stays connected for any traffic,
+#   2. the rest of the uplink budget of every AB is shared out proportional to the (symmetrised) demand by symmetric
+#      Sinkhorn scaling, so that no AB exceeds its budget,
+#   3. the fractional allocation is rounded down and the free ports are handed out greedily to the pairs with the
+#      largest remainders (ties go to the pairs which had more circuits before, which saves reconfigurations),
+#   4. the circuits of an AB are dealt out round-robin over its middle blocks, so no middle block exceeds its ports.
+#      A re-solve keeps the middle block circuits in place instead (as far as the new allocation still has them) and
+#      only places the added circuits, on the middle blocks with the most free ports.
+# All steps work on (A, A) numpy arrays, only the greedy rounding loops over the pairs with free ports on both ends.
+
+def aggregate_tor_matrix(topology, tor_traffic_matrix):
+    """Sum a ToR to ToR traffic matrix up to aggregation blocks.
+
+    :param topology: The Jupiter_bl object
+    :param tor_traffic_matrix: A (T, T) array of demands between the ToRs
+    :return: An (A, A) array of demands between the aggregation blocks
+    """
+
+    a = topology.aggregation_block_count
+    t = topology.tors_per_aggregation_block
+    return np.asarray(tor_traffic_matrix, dtype=float).reshape(a, t, a, t).sum(axis=(1, 3))
+
+
+def proportional_allocation(demand, budget, iterations=100):
+    """Fractional symmetric allocation X = diag(r) S diag(r) with S the symmetrised demand and row sums up to the budget.
+
+    :param demand: An (A, A) array of demands between the blocks
+    :param budget: An (A,) array with the number of ports each block can spend
+    :param iterations (optional, defaults to 100): Sinkhorn iterations
+    :return: An (A, A) symmetric float array with zero diagonal
+    """
+
+    symmetric = np.asarray(demand, dtype=float)
+    symmetric = symmetric + symmetric.T
+    np.fill_diagonal(symmetric, 0.0)
+    budget = np.asarray(budget, dtype=float)
+    scale = np.where(symmetric.sum(axis=1) > 0, 1.0, 0.0)
+    for _ in range(iterations):
+        load = scale * (symmetric @ scale)
+        # Geometric damping of the row scaling keeps the symmetric iteration from oscillating
+        scale = np.where(load > 0, scale * np.sqrt(budget / np.maximum(load, 1e-300)), 0.0)
+    allocation = scale[:, np.newaxis] * symmetric * scale[np.newaxis, :]
+    # Pairs of blocks can't always use their whole budgets (e.g. all traffic towards one block), cut the rows that are over
+    factor = np.minimum(1.0, budget / np.maximum(allocation.sum(axis=1), 1e-300))
+    return allocation * np.minimum(factor[:, np.newaxis], factor[np.newaxis, :])
+
+
+def round_allocation(fractional, budget, previous=None):
+    """Round a fractional allocation to integer circuit counts without exceeding the budgets.
+
+    :param fractional: An (A, A) symmetric float array
+    :param budget: An (A,) int array of ports per block
+    :param previous (optional, defaults to None): The (A, A) allocation in place, to break ties towards keeping circuits
+    :return: An (A, A) symmetric int64 array with zero diagonal
+    """
+
+    allocation = np.floor(fractional + 1e-9).astype(np.int64)
+    free = np.asarray(budget, dtype=np.int64) - allocation.sum(axis=1)
+    first, second = np.triu_indices(len(allocation), k=1)
+    remainder = (fractional - allocation)[first, second]
+    kept = np.zeros(len(first)) if previous is None else (np.asarray(previous) - allocation)[first, second]
+    # Largest remainder first, then the pairs which lose circuits otherwise, then the ones with demand at all
+    order = np.lexsort((fractional[first, second] <= 0, -kept, -remainder))
+    # Only pairs with a free port on both ends can take a circuit; repeat until no pair can
+    while True:
+        candidates = order[(free[first[order]] > 0) & (free[second[order]] > 0)]
+        if len(candidates) == 0:
+            break
+        for pair in candidates.tolist():
+            i, j = first[pair], second[pair]
+            if free[i] > 0 and free[j] > 0:
+                allocation[i, j] += 1
+                allocation[j, i] += 1
+                free[i] -= 1
+                free[j] -= 1
+    return allocation
+
+
+def allocate_block_links(demand, budget, min_links=1, previous=None):
+    """Demand proportional number of circuits between every pair of blocks.
+
+    Raises a ValueError if the budget doesn't cover min_links towards every other block.
+    :param demand: An (A, A) array of demands between the blocks
+    :param budget: Number of ports per block (int or (A,) array)
+    :param min_links (optional, defaults to 1): Circuits every pair of blocks keeps regardless of demand
+    :param previous (optional, defaults to None): The allocation in place, preferred on ties
+    :return: An (A, A) symmetric int64 array with zero diagonal, row sums at most the budget
+    """
+
+    demand = np.asarray(demand, dtype=float)
+    a = len(demand)
+    budget = np.broadcast_to(np.asarray(budget, dtype=np.int64), (a,))
+    if (budget < min_links * (a - 1)).any():
+        raise ValueError("%d ports per block can't keep %d link(s) to each of %d other blocks" % (budget.min(), min_links, a - 1))
+    floor = np.full((a, a), min_links, dtype=np.int64)
+    np.fill_diagonal(floor, 0)
+    rest = budget - floor.sum(axis=1)
+    fractional = proportional_allocation(demand, rest)
+    return floor + round_allocation(fractional, rest, None if previous is None else np.asarray(previous) - floor)
+
+
+def reconfiguration_delta(previous, current):
+    """Circuits to set up and tear down between two block level allocations.
+
+    :param previous: The (A, A) allocation in place
+    :param current: The (A, A) new allocation
+    :return: A tuple (added, removed, changed): two (A, A) int arrays of circuits added/removed per pair of blocks and
+        the number of circuits that have to be reconfigured
+    """
+
+    difference = np.asarray(current, dtype=np.int64) - np.asarray(previous, dtype=np.int64)
+    added = np.maximum(difference, 0)
+    removed = np.maximum(-difference, 0)
+    return added, removed, int(np.triu(added, k=1).sum() + np.triu(removed, k=1).sum())
+
+
+class EngineeredJupiter(Topology):
+    """Jupiter_bl rewired by topology engineering: the ToRs and middle blocks (MBs) stay, the spine blocks are replaced by
+    direct MB to MB circuits. Several circuits between the same two MBs form one link, see link_counts."""
+
+    # gen_graph() is built from gen_edges()
+    graph_from_edges = True
+
+    def __init__(self, base, allocation, previous=None):
+        """
+
+        :param base: The Jupiter_bl object that was engineered, its IDs and capacity function are kept
+        :param allocation: An (A, A) symmetric int array of circuits between the aggregation blocks
+        :param previous (optional, defaults to None): The EngineeredJupiter in place, its MB circuits are kept where the
+            allocation allows it. Without one the circuits are dealt out round-robin.
+        """
+
+        self.base = base
+        self.allocation = np.asarray(allocation, dtype=np.int64)
+        self.tor_idx_range = base.tor_idx_range
+        self.aggregation_idx_range = base.aggregation_idx_range
+        self.aggregation_block_count = base.aggregation_block_count
+        self.tors_per_aggregation_block = base.tors_per_aggregation_block
+        self.middle_block_per_aggregation = base.middle_block_per_aggregation
+        self.ports_per_middle_block_up = base.ports_per_middle_block_up
+        super().__init__([self.tor_idx_range, self.aggregation_idx_range], base.descriptor + "_te", base.capacity_function)
+        self.edges = None
+        self.link_counts = None
+        # Only the circuits of the previous wiring are needed, not the object (which would chain all earlier wirings)
+        self.placed = None if previous is None else self.place_circuits(previous.circuits())
+
+    def circuits(self):
+        """The MB level circuits. Without a previous wiring the n-th circuit of an AB (counting over its partner ABs in
+        order) ends at MB n % MBs, otherwise see place_circuits().
+
+        :return: An (C, 2) int64 array of MB switch ID pairs (smaller ID first), one row per circuit
+        """
+
+        if self.placed is not None:
+            return self.placed
+        mbs = self.middle_block_per_aggregation
+        first, second = np.triu_indices(self.aggregation_block_count, k=1)
+        counts = self.allocation[first, second]
+        # Position of the pair's first circuit in the enumeration of each of the two ABs
+        offsets = np.cumsum(self.allocation, axis=1) - self.allocation
+        circuit = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        i = np.repeat(first, counts)
+        j = np.repeat(second, counts)
+        mb_i = (np.repeat(offsets[first, second], counts) + circuit) % mbs
+        mb_j = (np.repeat(offsets[second, first], counts) + circuit) % mbs
+        agg_first = self.aggregation_idx_range[0]
+        return np.column_stack((agg_first + i * mbs + mb_i, agg_first + j * mbs + mb_j))
+
+    def place_circuits(self, old):
+        """MB circuits of the allocation starting from the circuits in place: every pair of ABs keeps its old circuits up to
+        its new count, the added circuits end at the MBs with the most free ports. An AB never has more circuits than MB
+        ports, so there always are free ports.
+
+        :param old: An (C, 2) array of MB switch ID pairs (smaller ID first), the circuits in place
+        :return: An (C', 2) int64 array of MB switch ID pairs (smaller ID first), one row per circuit
+        """
+
+        a = self.aggregation_block_count
+        mbs = self.middle_block_per_aggregation
+        agg_first = self.aggregation_idx_range[0]
+        old = np.asarray(old, dtype=np.int64).reshape(-1, 2)
+        blocks = (old - agg_first) // mbs
+        pairs = blocks[:, 0] * a + blocks[:, 1]
+        order = np.argsort(pairs, kind='stable')
+        old, pairs = old[order], pairs[order]
+        # Keep the first circuits of every pair, up to its new count
+        old_counts = np.bincount(pairs, minlength=a * a)
+        rank = np.arange(len(pairs)) - (np.cumsum(old_counts) - old_counts)[pairs]
+        kept = old[rank < self.allocation.ravel()[pairs]]
+
+        first, second = np.triu_indices(a, k=1)
+        added = np.maximum(self.allocation[first, second] - old_counts[first * a + second], 0)
+        # Both ends of every added circuit (row c of the result is ends 2c, 2c + 1), grouped by their AB
+        ends = np.column_stack((np.repeat(first, added), np.repeat(second, added))).ravel()
+        by_block = np.argsort(ends, kind='stable')
+        # Free MB ports as slots (AB, usage level, MB), the least used MBs first
+        usage = np.bincount((kept - agg_first).ravel(), minlength=a * mbs)
+        free = np.maximum(self.ports_per_middle_block_up - usage, 0)
+        slot_mb = np.repeat(np.arange(a * mbs), free)
+        slot_level = usage[slot_mb] + np.arange(len(slot_mb)) - np.repeat(np.cumsum(free) - free, free)
+        slot_block = slot_mb // mbs
+        slots = slot_mb[np.lexsort((slot_mb, slot_level, slot_block))]
+        slot_count = np.bincount(slot_block, minlength=a)
+        need = np.bincount(ends, minlength=a)
+        slot_rank = np.arange(len(slots)) - np.repeat(np.cumsum(slot_count) - slot_count, slot_count)
+        chosen = slots[slot_rank < np.repeat(need, slot_count)]
+        placed = np.empty(len(ends), dtype=np.int64)
+        placed[by_block] = chosen
+        return np.concatenate((kept, agg_first + placed.reshape(-1, 2)))
+
+    def gen_edges(self):
+        """ToR to MB links of the blocks plus the MB to MB links, computed once per object.
+
+        :return: An (E, 2) int64 numpy array of switch ID pairs (smaller ID first), one row per bidirectional link, sorted
+        """
+
+        if self.edges is None:
+            tpa = self.tors_per_aggregation_block
+            mbs = self.middle_block_per_aggregation
+            tors = np.repeat(np.asarray(self.tor_idx_range), mbs)
+            blocks = (tors - self.tor_idx_range[0]) // tpa
+            up = np.column_stack((tors, self.aggregation_idx_range[0] + blocks * mbs + np.tile(np.arange(mbs), len(self.tor_idx_range))))
+            # Circuits between the same MBs collapse into one link
+            mesh, counts = np.unique(self.circuits(), axis=0, return_counts=True)
+            edges = np.concatenate((up, mesh))
+            order = np.lexsort((edges[:, 1], edges[:, 0]))
+            self.edges = edges[order]
+            self.link_counts = np.concatenate((np.ones(len(up), dtype=np.int64), counts))[order]
+        return self.edges
+
+    def gen_capacities(self, links=None):
+        """Capacities of the capacity function (1 without one) times the number of circuits of the links.
+
+        :param links (optional, defaults to gen_links()): A (L, 2) array of (source, destination) switch IDs of this topology
+        :return: A float array with the capacity of every link, or None if there is neither a capacity function nor bundled circuits
+        """
+
+        edges = self.gen_edges()
+        if links is None:
+            links = self.gen_links()
+        base = super().gen_capacities(links)
+        if base is None and (self.link_counts == 1).all():
+            return None
+        # Number of circuits of every link, found in the sorted edge list
+        low = np.minimum(links[:, 0], links[:, 1])
+        high = np.maximum(links[:, 0], links[:, 1])
+        scale = edges[:, 1].max(initial=0) + 1
+        position = np.searchsorted(edges[:, 0] * scale + edges[:, 1], low * scale + high)
+        counts = self.link_counts[np.minimum(position, len(edges) - 1)]
+        return (np.ones(len(links)) if base is None else base) * counts
+
+    def gen_graph(self):
+        """Constructs a Networkx Graph of the engineered Jupiter, the links carry the number of circuits as 'circuits'
+
+        :return: A networkx DiGraph of the engineered Jupiter
+        """
+
+        edges = self.gen_edges()
+        G = gen_graph_from_edges(edges, len(self.tor_idx_range), len(self.aggregation_idx_range))
+        for (u, v), count in zip(edges.tolist(), self.link_counts.tolist()):
+            G.edges[u, v]['circuits'] = count
+            G.edges[v, u]['circuits'] = count
+        capacities = self.gen_capacities()
+        if capacities is not None:
+            for (u, v), capacity in zip(self.gen_links().tolist(), capacities.tolist()):
+                G.edges[u, v]['capacity'] = capacity
+        return G
+
+    def delta(self, previous):
+        """MB level reconfiguration from another engineered topology (or the initial uniform wiring) to this one.
+
+        :param previous: The EngineeredJupiter in place
+        :return: An (K, 3) int64 array of (MB, MB, change in circuits) for every MB pair whose number of circuits changes
+        """
+
+        def mesh(topology):
+            edges = topology.gen_edges()
+            is_mesh = edges[:, 0] >= self.aggregation_idx_range[0]
+            return edges[is_mesh], topology.link_counts[is_mesh]
+
+        old, old_counts = mesh(previous)
+        new, new_counts = mesh(self)
+        pairs, inverse = np.unique(np.concatenate((old, new)), axis=0, return_inverse=True)
+        change = np.zeros(len(pairs), dtype=np.int64)
+        np.add.at(change, inverse.ravel(), np.concatenate((-old_counts, new_counts)))
+        keep = change != 0
+        return np.column_stack((pairs[keep], change[keep]))
+
+    def set_node_positions(self):
+        """Compute the x-axis coordinate of nodes for later drawing: like Jupiter_bl without the spine layer.
+
+        :return: A 2-dimentional array representing the node positions. (horizontal pos, layer)
+        """
+
+        width = max(len(self.tor_idx_range), len(self.aggregation_idx_range))
+        return self.base.set_node_positions()[:2, :width]
@@ -0,0 +1,203 @@
+import gzip
+import re
+import numpy as np
+
+#####                #####
+####                  ####
+###    File exports    ###
+####                  ####
+#####                #####
+
+# All writers stream the links chunk by chunk from Topology.iter_edges(), so besides the link array itself they only
+# hold one chunk of formatted text in memory, no matter how large the topology is.
+# A filename ending in ".gz" (or compress=True) writes a gzip compressed file.
+
+def open_output(filename, compress=None):
+    """Open a text file for writing, gzip compressed if requested.
+
+    :param filename: Path of the file
+    :param compress (optional, defaults to filename ending in ".gz"): Whether to gzip the output
+    :return: A writable text file object
+    """
+
+    if compress is None:
+        compress = filename.endswith('.gz')
+    if compress:
+        return gzip.open(filename, 'wt', encoding='utf-8')
+    return open(filename, 'w', encoding='utf-8')
+
+
+def format_rows(template, *columns):
+    """Format the rows of some equally long arrays with a %-template.
+
+    :param template: Format string with one placeholder per column, including the line break
+    :param columns: Arrays holding the columns
+    :return: The formatted rows as one string
+    """
+    return ''.join(template % row for row in zip(*[np.asarray(column).tolist() for column in columns]))
+
+
+def capacities_or_ones(topology, chunk):
+    """Capacities of a chunk of links, 1.0 if the topology has no capacity function."""
+    capacities = topology.gen_capacities(chunk)
+    return np.ones(len(chunk)) if capacities is None else capacities
+
+
+def name_of(topology):
+    """Descriptor of the topology turned into a valid identifier"""
+    name = re.sub(r'\W', '_', topology.descriptor)
+    return name if name[:1].isalpha() else 'T_' + name
+
+
+def write_edge_list(topology, filename, chunk_size=65536, compress=None):
+    """Write the directed links as CSV: source,target and capacity if the topology has a capacity function.
+
+    :param topology: The topology object to export
+    :param filename: Path of the output file
+    :param chunk_size (optional, defaults to 65536): How many links are formatted at once
+    :param compress (optional, defaults to filename ending in ".gz"): Whether to gzip the output
+    :return: The filename
+    """
+
+    with open_output(filename, compress) as f:
+        if topology.capacity_function is None:
+            f.write("source,target\n")
+            for chunk in topology.iter_edges(chunk_size, directed=True):
+                f.write(format_rows("%d,%d\n", chunk[:, 0], chunk[:, 1]))
+        else:
+            f.write("source,target,capacity\n")
+            for chunk in topology.iter_edges(chunk_size, directed=True):
+                f.write(format_rows("%d,%d,%r\n", chunk[:, 0], chunk[:, 1], topology.gen_capacities(chunk)))
+    return filename
+
+
+def write_graphml(topology, filename, chunk_size=65536, compress=None):
+    """Write the topology as GraphML, holding the same directed graph as gen_graph() with the layer of every switch.
+
+    :param topology: The topology object to export
+    :param filename: Path of the output file
+    :param chunk_size (optional, defaults to 65536): How many switches/links are formatted at once
+    :param compress (optional, defaults to filename ending in ".gz"): Whether to gzip the output
+    :return: The filename
+    """
+
+    with open_output(filename, compress) as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n'
+                '<graphml xmlns="http://graphml.graphdrawing.org/xmlns" '
+                'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                'xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">\n'
+                '  <key id="d0" for="node" attr.name="layer" attr.type="int" />\n'
+                '  <key id="d1" for="edge" attr.name="capacity" attr.type="double" />\n'
+                '  <graph id="%s" edgedefault="directed">\n' % name_of(topology))
+        # Switches
+        first_id = topology.indices[0][0]
+        last_id = topology.indices[-1][-1]
+        for start in range(first_id, last_id + 1, chunk_size):
+            ids = np.arange(start, min(start + chunk_size, last_id + 1))
+            f.write(format_rows('    <node id="%d">\n      <data key="d0">%d</data>\n    </node>\n', ids, topology.layer_of(ids)))
+        # Links
+        for chunk in topology.iter_edges(chunk_size, directed=True):
+            if topology.capacity_function is None:
+                f.write(format_rows('    <edge source="%d" target="%d" />\n', chunk[:, 0], chunk[:, 1]))
+            else:
+                f.write(format_rows('    <edge source="%d" target="%d">\n      <data key="d1">%r</data>\n    </edge>\n',
+                                    chunk[:, 0], chunk[:, 1], topology.gen_capacities(chunk)))
+        f.write('  </graph>\n</graphml>\n')
+    return filename
+
+
+def write_ns3(topology, filename, chunk_size=65536, compress=None):
+    """Write the topology in the Inet format read by ns-3's InetTopologyReader:
+    a "<nodes> <links>" header, one "<id> <x> <y>" line per switch (drawing coordinates)
+    and one "<from> <to> <weight>" line per bidirectional link, the weight being the capacity (1 if there is no capacity function).
+
+    :param topology: The topology object to export
+    :param filename: Path of the output file
+    :param chunk_size (optional, defaults to 65536): How many switches/links are formatted at once
+    :param compress (optional, defaults to filename ending in ".gz"): Whether to gzip the output
+    :return: The filename
+    """
+
+    first_id = topology.indices[0][0]
+    x, y = topology.node_coordinates()
+    with open_output(filename, compress) as f:
+        f.write("%d %d\n" % (len(x), len(topology.gen_edges())))
+        for start in range(0, len(x), chunk_size):
+            ids = np.arange(start, min(start + chunk_size, len(x)))
+            f.write(format_rows("%d %r %r\n", ids + first_id, x[ids], y[ids]))
+        for chunk in topology.iter_edges(chunk_size):
+            f.write(format_rows("%d %d %r\n", chunk[:, 0], chunk[:, 1], capacities_or_ones(topology, chunk)))
+    return filename
+
+
+def write_mininet(topology, filename, chunk_size=65536, compress=None):
+    """Write a Mininet custom topology script. Switches are called s<ID>, capacities become the bw parameter of the links
+    (Mininet expects Mbit/s and needs --link tc to enforce them). Links where the capacity function returns None get no bw.
+
+    Run with: sudo mn --custom <filename> --topo <descriptor>
+    :param topology: The topology object to export
+    :param filename: Path of the output file
+    :param chunk_size (optional, defaults to 65536): How many links are formatted at once
+    :param compress (optional, defaults to filename ending in ".gz"): Whether to gzip the output
+    :return: The filename
+    """
+
+    name = name_of(topology)
+    with open_output(filename, compress) as f:
+        f.write('"""Mininet topology generated from %s\n\n'
+                'Run with: sudo mn --custom %s --topo %s\n"""\n'
+                'from mininet.topo import Topo\n\n\n'
+                'class %s(Topo):\n\n'
+                '    def build(self):\n'
+                '        switches = {}\n'
+                '        for i in range(%d, %d):\n'
+                '            switches[i] = self.addSwitch("s%%d" %% i)\n'
+                '        for (u, v, capacity) in LINKS:\n'
+                '            if capacity is None:\n'
+                '                self.addLink(switches[u], switches[v])\n'
+                '            else:\n'
+                '                self.addLink(switches[u], switches[v], bw=capacity)\n\n\n'
+                'LINKS = [\n' % (topology.descriptor, filename, name, name, topology.indices[0][0], topology.indices[-1][-1] + 1))
+        for chunk in topology.iter_edges(chunk_size):
+            if topology.capacity_function is None:
+                f.write(format_rows("    (%d, %d, None),\n", chunk[:, 0], chunk[:, 1]))
+            else:
+                # Links without capacity (NaN) get no bw, like without capacity function
+                capacities = topology.gen_capacities(chunk)
+                f.write(format_rows("    (%d, %d, %r),\n", chunk[:, 0], chunk[:, 1], np.where(np.isnan(capacities), None, capacities)))
+        f.write(']\n\ntopos = {"%s": %s}\n' % (name, name))
+    return filename
+
+
+def write_ned(topology, filename, chunk_size=65536, compress=None, switch_type="Switch", datarate_unit="Gbps"):
+    """Write an OMNeT++ NED network. Switch i is the submodule switch[i - 1], links become bidirectional connections
+    between "port" gates with a DatarateChannel if the topology has a capacity function (none for links where it returns None).
+
+    :param topology: The topology object to export
+    :param filename: Path of the output file
+    :param chunk_size (optional, defaults to 65536): How many links are formatted at once
+    :param compress (optional, defaults to filename ending in ".gz"): Whether to gzip the output
+    :param switch_type (optional, defaults to "Switch"): Module type of the switches, it needs an "inout port[]" gate vector.
+        With the default a simple module Switch is declared in the file.
+    :param datarate_unit (optional, defaults to "Gbps"): Unit of the capacities
+    :return: The filename
+    """
+
+    name = name_of(topology)
+    first_id = topology.indices[0][0]
+    switch_count = topology.indices[-1][-1] + 1 - first_id
+    with open_output(filename, compress) as f:
+        f.write("// OMNeT++ network generated from %s\n\n" % topology.descriptor)
+        if switch_type == "Switch":
+            f.write("simple Switch\n{\n    gates:\n        inout port[];\n}\n\n")
+        f.write("network %s\n{\n    submodules:\n        switch[%d]: %s;\n    connections allowunconnected:\n" % (name, switch_count, switch_type))
+        for chunk in topology.iter_edges(chunk_size):
+            if topology.capacity_function is None:
+                f.write(format_rows("        switch[%d].port++ <--> switch[%d].port++;\n", chunk[:, 0] - first_id, chunk[:, 1] - first_id))
+            else:
+                # Links without capacity (NaN) get no channel
+                channels = ["" if np.isnan(capacity) else " ned.DatarateChannel { datarate = %r%s; } <-->" % (capacity, datarate_unit)
+                            for capacity in topology.gen_capacities(chunk).tolist()]
+                f.write(format_rows("        switch[%d].port++ <-->%s switch[%d].port++;\n", chunk[:, 0] - first_id, channels, chunk[:, 1] - first_id))
+        f.write("}\n")
+    return filename
@@ -1,5 +1,6 @@
 from .topology import Topology
 from .util import gen_nodes, preprocess_node_positions
+from .wiring import Layer, FullBipartite, Striped
 import numpy as np
 
 class Fabric(Topology):
@@ -33,6 +34,9 @@ class Fabric(Topology):
         self.spine_idx_range = range(last_fabric_idx + 1, last_spine_idx + 1)
         self.edge_idx_range = range(last_spine_idx + 1, last_edge_idx + 1)
         indices = [self.tor_idx_range, self.fabric_idx_range, self.spine_idx_range, self.edge_idx_range]
+        if edge_pods == 0:
+            # Without edge pods there is no edge layer (an empty layer has no first or last switch ID)
+            indices = indices[:3]
         super().__init__(indices,
                          "Fabric_" + str(server_pods) + "_" + str(edge_pods) + "_" + str(nr_of_planes) + "_"
                          + str(port_count), capacity_function)
@@ -105,6 +109,23 @@ class Fabric(Topology):
 
         return G
 
+    def clos_spec(self):
+        """Describe Fabric as layers and wiring rules: ToRs connect to all fabric switches of their pod, fabric and edge
+        switches connect to all spine switches of their plane.
+
+        :return: A tuple (layers, rules)
+        """
+
+        layers = [Layer("tor", len(self.tor_idx_range), self.port_count),
+                  Layer("fabric", len(self.fabric_idx_range), self.nr_of_planes),
+                  Layer("spine", len(self.spine_idx_range), self.nr_of_planes)]
+        rules = [FullBipartite("tor", "fabric"),
+                 Striped("fabric", "spine", self.nr_of_planes)]
+        if self.edge_pods > 0:
+            layers.append(Layer("edge", len(self.edge_idx_range), self.nr_of_planes))
+            rules.append(Striped("edge", "spine", self.nr_of_planes))
+        return layers, rules
+
     def set_node_positions(self):
         """Compute the x-axis coordinate of nodes for later drawing.
 
@@ -117,7 +138,7 @@ class Fabric(Topology):
         TOR_LAYER = 0
         FABRIC_LAYER = 1
         SPINE_LAYER = 2
-        EDGE_LAYER = 4
+        EDGE_LAYER = 3
 
         def group_layer_relative(static_idx, switches_per_pod_static, pods_static, relative_idx, switches_per_pod_relative, position):
             """Helper method to symmetrically group one layer relative to another"""
@@ -160,7 +181,7 @@ class Fabric(Topology):
         # find widest layer
         widest_layer = 0
         nr_of_nodes = 0
-        for i in range(0, 4):
+        for i in range(0, len(self.indices)):
             if self.indices[i][-1] + 1 - self.indices[i][0] > nr_of_nodes:
                 # '>' favours tor layer as init layer
                 widest_layer = i
@@ -177,7 +198,10 @@ class Fabric(Topology):
             # Edge switches
             # Spacing between server pods
             edge_spacing = self.port_count * pos_step + 2
-            if self.edge_pods < self.server_pods:
+            if self.edge_pods == 0:
+                # No edge layer to place
+                pass
+            elif self.edge_pods < self.server_pods:
                 # Assuming there are at least as many Spine switches as Edge switches!
                 position = mirror_positions(SPINE_LAYER, EDGE_LAYER, position)
                 # Shift for symmetry
@@ -224,10 +248,11 @@ class Fabric(Topology):
                 # Mirror position for the second layer
                 other_widest = FABRIC_LAYER if widest_layer == SPINE_LAYER else SPINE_LAYER
                 position[other_widest, :] = position[widest_layer, :]
-                # Initialize Edge layer relative to spine
-                position = group_layer_relative(SPINE_LAYER, self.nr_of_planes, self.server_pods, EDGE_LAYER, self.nr_of_planes, position)
-                # Shift
-                position = shift_layer(EDGE_LAYER, (self.server_pods - self.edge_pods)*layer_shift, position)
+                if self.edge_pods > 0:
+                    # Initialize Edge layer relative to spine
+                    position = group_layer_relative(SPINE_LAYER, self.nr_of_planes, self.server_pods, EDGE_LAYER, self.nr_of_planes, position)
+                    # Shift
+                    position = shift_layer(EDGE_LAYER, (self.server_pods - self.edge_pods)*layer_shift, position)
             # Centralize TOR switches below fabric layer
             position = group_layer_relative(FABRIC_LAYER, self.nr_of_planes, self.server_pods, TOR_LAYER, self.port_count, position)
         return position
@@ -1,5 +1,6 @@
 from .topology import Topology
 from .util import gen_nodes, preprocess_node_positions
+from .wiring import Layer, FullBipartite, Striped
 import numpy as np
 
 class FatTree(Topology):
@@ -33,6 +34,10 @@ class FatTree(Topology):
         indices = [self.tor_idx_range, self.aggregation_idx_range, self.core_idx_range]
         super().__init__(indices, "FatTree_" + str(port_count), capacity_function)
 
+    def default_hosts_per_tor(self):
+        """In a FatTree half of the ToR ports face the hosts"""
+        return self.port_count // 2
+
     def gen_graph(self):
         """Constructs a Networkx Graph of a FatTree
 
@@ -78,6 +83,21 @@ class FatTree(Topology):
 
         return G
 
+    def clos_spec(self):
+        """Describe the FatTree as layers and wiring rules: ToRs and aggregation switches are fully connected inside a pod,
+        the i-th aggregation switch of every pod connects to the i-th group of core switches.
+
+        :return: A tuple (layers, rules)
+        """
+
+        half = self.port_count // 2
+        layers = [Layer("tor", self.tor_switches, half),
+                  Layer("aggregation", self.aggregation_switches, half),
+                  Layer("core", self.core_switches, half)]
+        rules = [FullBipartite("tor", "aggregation"),
+                 Striped("aggregation", "core", half, upper_stride=half)]
+        return layers, rules
+
     def set_node_positions(self):
         """Compute the x-axis coordinate of nodes for later drawing.
 
@@ -0,0 +1,120 @@
+import numpy as np
+
+class HostLayer:
+    """Hosts (servers) attached below the ToR layer of a topology
+
+    The attachment is implicit: the hosts get the IDs following the highest switch ID and every ToR holds
+    hosts_per_tor consecutive hosts, so host h sits below ToR tor_idx_range[0] + (h - host_idx_range[0]) // hosts_per_tor.
+    Nothing is stored per host unless asked for, hosts only appear in a networkx graph through materialize().
+    """
+
+    def __init__(self, topology, hosts_per_tor):
+        """
+
+        Raises a ValueError if hosts_per_tor is smaller than 1.
+        :param topology: The topology the hosts are attached to (its first layer holds the ToRs)
+        :param hosts_per_tor: How many hosts are attached to each ToR
+        """
+
+        if hosts_per_tor < 1:
+            raise ValueError("There must be at least one host per ToR")
+        self.topology = topology
+        self.hosts_per_tor = hosts_per_tor
+        self.tor_idx_range = topology.indices[0]
+        first_host_idx = topology.indices[-1][-1] + 1
+        self.host_idx_range = range(first_host_idx, first_host_idx + len(self.tor_idx_range) * hosts_per_tor)
+        self._host_to_tor = None
+
+    def __len__(self):
+        return len(self.host_idx_range)
+
+    def tor_of(self, hosts):
+        """ToR a host is attached to.
+
+        :param hosts: A host ID or an array of host IDs
+        :return: The ToR ID (or an array of ToR IDs)
+        """
+        return self.tor_idx_range[0] + (np.asarray(hosts) - self.host_idx_range[0]) // self.hosts_per_tor
+
+    def hosts_of(self, tor):
+        """Hosts attached to a ToR.
+
+        :param tor: A ToR ID
+        :return: A range of host IDs
+        """
+
+        first = self.host_idx_range[0] + (tor - self.tor_idx_range[0]) * self.hosts_per_tor
+        return range(first, first + self.hosts_per_tor)
+
+    @property
+    def host_to_tor(self):
+        """Array lookup table holding the ToR ID of every host, position i belongs to host host_idx_range[i]"""
+        if self._host_to_tor is None:
+            self._host_to_tor = self.tor_of(np.arange(self.host_idx_range[0], self.host_idx_range[-1] + 1, dtype=np.int64))
+        return self._host_to_tor
+
+    def tor_positions(self, hosts):
+        """Position of the ToRs of some hosts inside the ToR layer (0-based), handy for indexing ToR-level arrays.
+
+        :param hosts: A host ID or an array of host IDs
+        :return: The position (or an array of positions)
+        """
+        return (np.asarray(hosts) - self.host_idx_range[0]) // self.hosts_per_tor
+
+    def tor_traffic_matrix(self, host_tm):
+        """Aggregates a dense host-to-host traffic matrix to ToR level. Traffic between hosts of the same ToR ends up on the diagonal.
+
+        Raises a ValueError if the matrix doesn't have one row and column per host.
+        :param host_tm: An (H, H) array, entry [i, j] holds the demand from host host_idx_range[i] to host host_idx_range[j]
+        :return: A (T, T) array of demands between the ToRs (ordered as in tor_idx_range)
+        """
+
+        host_tm = np.asarray(host_tm)
+        h = len(self.host_idx_range)
+        if host_tm.shape != (h, h):
+            raise ValueError("Expected a (%d, %d) host traffic matrix, got %s" % (h, h, str(host_tm.shape)))
+        t = len(self.tor_idx_range)
+        return host_tm.reshape(t, self.hosts_per_tor, t, self.hosts_per_tor).sum(axis=(1, 3))
+
+    def tor_demands(self, src_hosts, dst_hosts, volumes=None):
+        """Aggregates a list of host-level flows to a ToR traffic matrix without ever building a host-level matrix.
+
+        :param src_hosts: Array of source host IDs
+        :param dst_hosts: Array of destination host IDs
+        :param volumes (optional, defaults to 1 per flow): Array holding the volume of each flow
+        :return: A (T, T) float array of demands between the ToRs (ordered as in tor_idx_range)
+        """
+
+        t = len(self.tor_idx_range)
+        pairs = self.tor_positions(src_hosts) * t + self.tor_positions(dst_hosts)
+        return np.bincount(np.ravel(pairs), weights=None if volumes is None else np.ravel(volumes),
+                           minlength=t * t).reshape(t, t).astype(float)
+
+    def host_traffic_matrix(self, tor_tm):
+        """Spreads a ToR traffic matrix evenly over the hosts. Beware, the result has H x H entries.
+
+        :param tor_tm: A (T, T) array of demands between the ToRs
+        :return: An (H, H) array of demands between the hosts
+        """
+
+        per_pair = np.asarray(tor_tm, dtype=float) / (self.hosts_per_tor * self.hosts_per_tor)
+        return np.repeat(np.repeat(per_pair, self.hosts_per_tor, axis=0), self.hosts_per_tor, axis=1)
+
+    def materialize(self, G, tors=None):
+        """Adds the hosts and their links to a graph (in both directions). Capacities are set with the capacity function of the topology.
+
+        :param G: The networkx graph of the topology
+        :param tors (optional, defaults to all ToRs): Only add the hosts below these ToRs, e.g. for a partial graph
+        :return: The updated graph G
+        """
+
+        if tors is None:
+            tors = self.tor_idx_range
+        for tor in tors:
+            for host in self.hosts_of(tor):
+                G.add_edge(host, tor)
+                G.add_edge(tor, host)
+                if self.topology.capacity_function is not None:
+                    G.edges[host, tor]['capacity'] = self.topology.capacity(host, tor)
+                    G.edges[tor, host]['capacity'] = self.topology.capacity(tor, host)
+        return G
@@ -0,0 +1,92 @@
+from .topology import Topology
+from .util import gen_graph_from_edges, preprocess_node_positions, random_pairing
+import numpy as np
+
+class Jellyfish(Topology):
+    """ Jellyfish, a random graph of ToR switches
+
+    Structure extracted from: https://www.usenix.org/system/files/conference/nsdi12/nsdi12-final82.pdf
+    """
+
+    # gen_graph() is built from gen_edges()
+    graph_from_edges = True
+
+    def __init__(self, switch_count, network_ports, seed=0, capacity_function=None):
+        """
+
+        Raises a ValueError if the ports can't be wired into a graph without self loops and parallel links.
+        :param switch_count: How many switches to instantiate
+        :param network_ports: How many ports of each switch connect to other switches, either one number or a list with one entry per switch.
+        :param seed (optional, defaults to 0): Seed of the random wiring, the same seed always gives the same topology
+        :param capacity_function (optional, defaults to None): Function used to initialise link capacities based on their endpoints.
+        """
+
+        ports = np.asarray(network_ports, dtype=np.int64)
+        if ports.ndim == 0:
+            ports = np.full(switch_count, int(ports))
+        if len(ports) != switch_count:
+            raise ValueError("Expected one port count per switch")
+        if ports.max(initial=0) >= switch_count:
+            raise ValueError("A switch can't connect to more than all other switches")
+        if ports.sum() % 2 != 0:
+            raise ValueError("The total nr. of network ports must be even to wire them all")
+        self.switch_count = switch_count
+        self.network_ports = ports
+        self.seed = seed
+        self.edges = None
+        self.tor_idx_range = range(1, switch_count + 1)
+        indices = [self.tor_idx_range]
+        uniform = len(ports) == 0 or (ports == ports[0]).all()
+        super().__init__(indices, "Jellyfish_" + str(switch_count) + "_" + (str(ports[0]) if uniform else "mixed")
+                         + "_" + str(seed), capacity_function)
+
+    @classmethod
+    def matched_to(cls, topology, seed=0, capacity_function=None):
+        """Jellyfish with the same switch count and the same network ports per switch as another topology.
+
+        :param topology: The topology object to match
+        :param seed (optional, defaults to 0): Seed of the random wiring
+        :param capacity_function (optional, defaults to None): Function used to initialise link capacities based on their endpoints.
+        :return: A Jellyfish object
+        """
+
+        first_id = topology.indices[0][0]
+        switch_count = topology.indices[-1][-1] + 1 - first_id
+        ports = np.bincount(topology.gen_edges().ravel() - first_id, minlength=switch_count)
+        jellyfish = cls(switch_count, ports, seed, capacity_function)
+        jellyfish.descriptor = "Jellyfish_" + topology.descriptor + "_" + str(seed)
+        return jellyfish
+
+    def gen_edges(self):
+        """Wire the ports randomly (configuration model), computed once per object.
+
+        :return: An (E, 2) int64 numpy array of switch ID pairs (smaller ID first), one row per bidirectional link, sorted
+        """
+
+        if self.edges is None:
+            rng = np.random.default_rng(self.seed)
+            stubs = np.repeat(np.arange(1, self.switch_count + 1), self.network_ports)
+            self.edges = random_pairing(stubs, rng)
+        return self.edges
+
+    def gen_graph(self):
+        """Constructs a Networkx Graph of the Jellyfish
+
+        :return: A networkx DiGraph of the Jellyfish
+        """
+
+        G = gen_graph_from_edges(self.gen_edges(), self.switch_count)
+
+        # Initialize Capacities
+        G = self.init_capacities(G)
+
+        return G
+
+    def set_node_positions(self):
+        """Compute the x-axis coordinate of nodes for later drawing. All switches sit evenly spaced in one layer.
+
+        :return: A 2-dimentional array representing the node positions. (horizontal pos, layer)
+        """
+
+        _, _, position = preprocess_node_positions(self)
+        return position
@@ -1,5 +1,6 @@
 from .topology import Topology
 from .util import gen_nodes, preprocess_node_positions
+from .wiring import Layer, Mesh, RoundRobin, Striped
 import numpy as np
 
 class Jupiter(Topology):
@@ -141,6 +142,27 @@ class Jupiter(Topology):
 
         return G
 
+    def clos_spec(self):
+        """Describe Jupiter as layers and wiring rules: switches inside a spine block and inside a middle block are fully
+        meshed, every ToR connects to two neighbouring switch positions in all middle blocks of its aggregation block and
+        the aggregation switches spread 8 uplinks each round-robin over the spine blocks.
+
+        :return: A tuple (layers, rules)
+        """
+
+        agg_block_size = self.middle_block_per_aggregation * self.switches_per_middle_block
+        tors_per_position = self.tors_per_aggregation_block // self.switches_per_middle_block
+        layers = [Layer("tor", len(self.tor_idx_range), self.tors_per_aggregation_block),
+                  Layer("aggregation", len(self.aggregation_idx_range), agg_block_size),
+                  Layer("spine", len(self.spine_idx_range), self.switches_per_spine)]
+        rules = [Mesh("spine"),
+                 Mesh("aggregation", self.switches_per_middle_block),
+                 RoundRobin("aggregation", "spine", 8, self.switches_per_spine),
+                 # Dual redundant, finishing at different Centauri chassis in the same MB
+                 Striped("tor", "aggregation", self.switches_per_middle_block, lower_stride=tors_per_position, grouped=True),
+                 Striped("tor", "aggregation", self.switches_per_middle_block, lower_stride=tors_per_position, shift=1, grouped=True)]
+        return layers, rules
+
     def set_node_positions(self):
         """Compute the x-axis coordinate of nodes for later drawing.
 
@@ -181,12 +203,13 @@ class Jupiter(Topology):
 
         return position
 
-    def draw_topology(self, G=None):
-        """Draw the graph to a pdf file: uses Graphviz .dot format.
+    def generate_drawing(self, G=None):
+        """Sets some basic parameters for drawing and creates a G_dot object (Graphviz .dot format) for later drawing.
 
         This function was overwritten to pull apart the switches forming the middle blocks and the aggregation block onto seperate layers to increase visibility.
 
-        :param G: The networkx graph which should be drawn.
+        :param G: The networkx graph you would like to draw
+        :return: node_width (drawing parameter), index_limits (list of switch indices per layer), G_dot (the object used for drawing)
         """
 
         node_width, index_limits, G_dot = super().generate_drawing(G)
@@ -210,7 +233,5 @@ class Jupiter(Topology):
                 else:
                     node.set_pos('%.1f,2.7!' % (pos[2, id - index_limits[1] - 1] - node_width).astype(float))
 
-        # Write to a file: change format to .png or .pdf
-        filename = self.descriptor + '.pdf'
-        G_dot.write_pdf(filename)
+        return node_width, index_limits, G_dot
 
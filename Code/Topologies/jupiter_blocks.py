@@ -1,5 +1,7 @@
 from .topology import Topology
 from .util import gen_nodes, preprocess_node_positions
+from .wiring import Layer, FullBipartite, RoundRobin
+from .engineering import EngineeredJupiter, aggregate_tor_matrix, allocate_block_links
 import numpy as np
 
 class Jupiter_bl(Topology):
@@ -122,6 +124,56 @@ class Jupiter_bl(Topology):
 
         return G
 
+    def clos_spec(self):
+        """Describe Jupiter_bl as layers and wiring rules: ToRs connect to all middle blocks of their aggregation block,
+        the middle blocks spread their uplinks round-robin over the spine blocks.
+
+        :return: A tuple (layers, rules)
+        """
+
+        layers = [Layer("tor", len(self.tor_idx_range), self.tors_per_aggregation_block),
+                  Layer("aggregation", len(self.aggregation_idx_range), self.middle_block_per_aggregation),
+                  Layer("spine", len(self.spine_idx_range))]
+        # With at least as many uplinks as spine blocks, the round-robin reaches every spine block
+        rules = [FullBipartite("tor", "aggregation"),
+                 RoundRobin("aggregation", "spine", self.ports_per_middle_block_up)]
+        return layers, rules
+
+    def uplink_budget(self):
+        """How many circuits an aggregation block can terminate: the uplinks of all its middle blocks"""
+        return self.middle_block_per_aggregation * self.ports_per_middle_block_up
+
+    def engineer(self, traffic_matrix, previous=None, min_links=1):
+        """Topology engineering: replace the spine blocks by direct middle block circuits sized by demand (see engineering.py).
+
+        Raises a ValueError if the traffic matrix has the wrong shape or the uplinks can't keep min_links to every other block.
+        :param traffic_matrix: An (A, A) array of demands between the aggregation blocks, or a (T, T) ToR traffic matrix
+        :param previous (optional, defaults to the uniform wiring): The EngineeredJupiter in place, ties are broken towards its circuits
+        :param min_links (optional, defaults to 1): Circuits every pair of aggregation blocks keeps regardless of demand
+        :return: The rewired EngineeredJupiter; its delta(previous) and engineering.reconfiguration_delta() give the changes
+        """
+
+        a = self.aggregation_block_count
+        traffic_matrix = np.asarray(traffic_matrix, dtype=float)
+        if traffic_matrix.shape == (len(self.tor_idx_range), len(self.tor_idx_range)):
+            traffic_matrix = aggregate_tor_matrix(self, traffic_matrix)
+        if traffic_matrix.shape != (a, a):
+            raise ValueError("Expected a %d x %d block or ToR traffic matrix, got %s" % (a, a, str(traffic_matrix.shape)))
+        if previous is None:
+            previous = self.uniform_wiring(min_links)
+        allocation = allocate_block_links(traffic_matrix, self.uplink_budget(), min_links, previous.allocation)
+        return EngineeredJupiter(self, allocation, previous)
+
+    def uniform_wiring(self, min_links=1):
+        """Direct middle block wiring without traffic information: the uplinks spread evenly over all other blocks.
+
+        :param min_links (optional, defaults to 1): Circuits every pair of aggregation blocks keeps
+        :return: An EngineeredJupiter
+        """
+
+        a = self.aggregation_block_count
+        return EngineeredJupiter(self, allocate_block_links(np.zeros((a, a)), self.uplink_budget(), min_links))
+
     def set_node_positions(self):
         """Compute the x-axis coordinate of nodes for later drawing.
 
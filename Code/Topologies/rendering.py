@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+#####                      #####
+####                        ####
+###    Background drawing    ###
+####                        ####
+#####                      #####
+
+def render(topology, G=None, filename=None, output_format='pdf'):
+    """Draw a topology (or a partial graph of it) to a file, same as Topology.draw_topology() but with a free choice of file and format.
+
+    :param topology: The topology object to draw
+    :param G (optional): The networkx graph which should be drawn, defaults to the full graph of the topology
+    :param filename (optional, defaults to <descriptor>.<output_format>): Where to write the drawing
+    :param output_format (optional, defaults to 'pdf'): Any output format Graphviz supports (pdf, png, svg, ...)
+    :return: The filename the drawing was written to
+    """
+
+    if filename is None:
+        filename = topology.descriptor + '.' + output_format
+    _, _, G_dot = topology.generate_drawing(G)
+    G_dot.write(filename, format=output_format)
+    return filename
+
+
+class RenderQueue:
+    """Renders topology drawings in the background
+
+    The Graphviz processes run in a thread (or process) pool, so at most max_workers drawings are rendered at the same time.
+    Jobs are identified by the descriptor of the topology at submission time and the output format:
+    submitting a job which is already queued, running or done returns the future of the first submission.
+    Use as a context manager or call shutdown() once done.
+    """
+
+    def __init__(self, max_workers=4, use_processes=False, output_format='pdf'):
+        """
+
+        :param max_workers (optional, defaults to 4): How many drawings are rendered in parallel
+        :param use_processes (optional, defaults to False): Render in worker processes instead of threads,
+            the topologies (including their capacity function) and graphs must then be picklable
+        :param output_format (optional, defaults to 'pdf'): Output format of the drawings
+        """
+
+        executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self.executor = executor(max_workers=max_workers)
+        self.output_format = output_format
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, topology, G=None, descriptor=None):
+        """Queue a drawing.
+
+        :param topology: The topology object to draw
+        :param G (optional): The networkx graph which should be drawn (e.g. a subgraph), defaults to the full graph of the topology
+        :param descriptor (optional, defaults to topology.descriptor): Identifies the job and names the output file,
+            pass a different one for every partial drawing of the same topology
+        :return: A concurrent.futures.Future resolving to the path of the drawing
+        """
+
+        if descriptor is None:
+            descriptor = topology.descriptor
+        key = (descriptor, self.output_format)
+        with self.lock:
+            future = self.jobs.get(key)
+            if future is None or (future.done() and future.exception() is not None):
+                # New job or retry of a failed one
+                future = self.executor.submit(render, topology, G, descriptor + '.' + self.output_format, self.output_format)
+                self.jobs[key] = future
+        return future
+
+    def forget(self, descriptor):
+        """Drop a finished job, so the next submission with this descriptor renders again.
+
+        :param descriptor: The descriptor of the job
+        """
+
+        with self.lock:
+            self.jobs.pop((descriptor, self.output_format), None)
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and release the workers.
+
+        :param wait (optional, defaults to True): Block until all queued drawings are done
+        """
+        self.executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+
+# Shared queue used by the coroutines if none is passed
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+def default_queue():
+    """The shared RenderQueue, created on first use.
+
+    :return: A RenderQueue with default settings
+    """
+
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = RenderQueue()
+    return _default_queue
+
+
+async def draw_topology_async(topology, G=None, descriptor=None, queue=None):
+    """Coroutine drawing a topology without blocking the event loop.
+
+    :param topology: The topology object to draw
+    :param G (optional): The networkx graph which should be drawn, defaults to the full graph of the topology
+    :param descriptor (optional, defaults to topology.descriptor): Identifies the job and names the output file
+    :param queue (optional, defaults to the shared queue): The RenderQueue doing the work
+    :return: The path of the drawing
+    """
+
+    if queue is None:
+        queue = default_queue()
+    return await asyncio.wrap_future(queue.submit(topology, G, descriptor))
+
+
+async def draw_topologies_async(topologies, queue=None):
+    """Coroutine drawing many topologies concurrently (bounded by the workers of the queue).
+
+    :param topologies: An iterable of topology objects or (topology, G, descriptor) tuples
+    :param queue (optional, defaults to the shared queue): The RenderQueue doing the work
+    :return: A list with the paths of the drawings, in the order of topologies
+    """
+
+    jobs = []
+    for job in topologies:
+        if isinstance(job, tuple):
+            jobs.append(draw_topology_async(*job, queue=queue))
+        else:
+            jobs.append(draw_topology_async(job, queue=queue))
+    return await asyncio.gather(*jobs)
@@ -0,0 +1,210 @@
+import os
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import shortest_path
+from .topology import FingerprintCache
+
+#####                    #####
+####                      ####
+###    Routing matrices    ###
+####                      ####
+#####                    #####
+
+# A routing matrix R holds one row per directed link (in the order of Topology.gen_links()) and one column per
+# ordered pair of ToRs (column = source position * T + destination position, positions inside tor_idx_range).
+# R[l, c] is the fraction of the traffic of pair c crossing link l under ECMP: at every switch the traffic towards a
+# destination is split evenly over all links that bring it one hop closer. In the layered topologies these shortest
+# paths are exactly the up-down paths through the layers.
+# Once R is built, the link loads of a whole batch of traffic matrices are a single sparse matrix product.
+
+def switch_adjacency(topology, links=None):
+    """Sparse adjacency matrix of the switches, row/column i belongs to switch ID i + 1 (the IDs start at 1).
+
+    :param topology: The topology object
+    :param links (optional, defaults to topology.gen_links()): Directed links to use
+    :return: An (N, N) scipy.sparse CSR matrix holding link index + 1 for every link (so that link 0 is not dropped as a zero)
+    """
+
+    if links is None:
+        links = topology.gen_links()
+    n = topology.indices[-1][-1]
+    return sp.csr_matrix((np.arange(1, len(links) + 1), (links[:, 0] - 1, links[:, 1] - 1)), shape=(n, n))
+
+
+class RoutingMatrix:
+    """ECMP routing matrix of a topology for batched traffic matrix evaluation
+
+    R holds about (ToR pairs x links on their paths) non-zeros, e.g. 2.2 million for FatTree(16).
+    Google's 2048-ToR default Jupiter variants need billions, route scaled down instances of them instead.
+    """
+
+    def __init__(self, topology, batch_size=64):
+        """
+
+        :param topology: The topology object to route on
+        :param batch_size (optional, defaults to 64): For how many destinations the shortest path distances are computed at once
+        """
+
+        self.topology = topology
+        self.links = topology.gen_links()
+        self.capacities = topology.gen_capacities(self.links)
+        tors = np.asarray(topology.indices[0]) - 1
+        t = len(tors)
+        n = topology.indices[-1][-1]
+        u = self.links[:, 0] - 1
+        v = self.links[:, 1] - 1
+        adjacency = switch_adjacency(topology, self.links)
+        # Flow starts with 1 at the source ToR of every column
+        start = sp.csr_matrix((np.ones(t), (tors, np.arange(t))), shape=(n, t))
+
+        rows, columns, fractions = [], [], []
+        for first in range(0, t, batch_size):
+            distances = shortest_path(adjacency, unweighted=True, indices=tors[first:first + batch_size])
+            for i, distance in enumerate(distances):
+                destination = first + i
+                # Links bringing the traffic one hop closer to the destination, split evenly per switch
+                on_path = np.flatnonzero(distance[v] == distance[u] - 1)
+                next_hops = np.bincount(u[on_path], minlength=n)
+                weights = 1.0 / next_hops[u[on_path]]
+                step = sp.csr_matrix((weights, (v[on_path], u[on_path])), shape=(n, n))
+                # Traffic crossing each switch for every source: sum over all hop counts
+                crossing = start
+                total = start
+                for _ in range(int(np.nanmax(distance[np.isfinite(distance)]))):
+                    crossing = step @ crossing
+                    if crossing.nnz == 0:
+                        break
+                    total = total + crossing
+                # Traffic on a link = traffic crossing its source switch * split weight
+                load = (sp.csr_matrix((weights, (np.arange(len(on_path)), u[on_path])), shape=(len(on_path), n)) @ total).tocoo()
+                rows.append(on_path[load.row])
+                columns.append(load.col * t + destination)
+                fractions.append(load.data)
+
+        self.tor_count = t
+        self.matrix = sp.csr_matrix((np.concatenate(fractions), (np.concatenate(rows), np.concatenate(columns))),
+                                    shape=(len(self.links), t * t))
+
+    def link_loads(self, traffic_matrices):
+        """Load of every link for a batch of ToR traffic matrices.
+
+        Raises a ValueError if the matrices are not T x T.
+        :param traffic_matrices: A (T, T) or (B, T, T) array, entry [b, i, j] holds the demand from the i-th to the j-th ToR
+        :return: An (L, B) array of link loads (L, 1 for a single matrix), rows ordered as Topology.gen_links()
+        """
+
+        t = self.tor_count
+        traffic_matrices = np.asarray(traffic_matrices, dtype=float)
+        if traffic_matrices.shape[-2:] != (t, t):
+            raise ValueError("Expected %d x %d traffic matrices, got %s" % (t, t, str(traffic_matrices.shape)))
+        return np.asarray(self.matrix @ traffic_matrices.reshape(-1, t * t).T)
+
+    def utilization(self, traffic_matrices, capacities=None):
+        """Utilization (load / capacity) of every link for a batch of ToR traffic matrices.
+
+        :param traffic_matrices: A (T, T) or (B, T, T) array of demands between the ToRs
+        :param capacities (optional, defaults to the capacities of the topology, 1 if there is no capacity function):
+            An (L,) array of link capacities or an (L, B) array with capacities per traffic matrix
+        :return: An (L, B) array of link utilizations
+        """
+
+        if capacities is None:
+            capacities = self.capacities if self.capacities is not None else np.ones(len(self.links))
+        capacities = np.asarray(capacities, dtype=float)
+        if capacities.ndim == 1:
+            capacities = capacities[:, np.newaxis]
+        return self.link_loads(traffic_matrices) / capacities
+
+    def max_link_utilization(self, traffic_matrices, capacities=None):
+        """Maximum link utilization for a batch of ToR traffic matrices. Links without capacity (NaN) are ignored.
+
+        :param traffic_matrices: A (T, T) or (B, T, T) array of demands between the ToRs
+        :param capacities (optional, see utilization()): Link capacities
+        :return: A (B,) array holding the max link utilization of every traffic matrix
+        """
+        return np.nanmax(self.utilization(traffic_matrices, capacities), axis=0)
+
+    def evaluate_file(self, path, batch_size=256, capacities=None):
+        """Max link utilization of all traffic matrices stored in a file, streamed batch by batch.
+
+        :param path: See iter_traffic_matrices()
+        :param batch_size (optional, defaults to 256): How many traffic matrices are evaluated at once
+        :param capacities (optional, see utilization()): Link capacities
+        :return: An array holding the max link utilization of every traffic matrix in the file
+        """
+
+        results = [np.zeros(0)]
+        for batch in iter_traffic_matrices(path, batch_size, (self.tor_count, self.tor_count)):
+            results.append(self.max_link_utilization(batch, capacities))
+        return np.concatenate(results)
+
+    def evaluate_trace(self, trace, traffic_matrices, batch_size=256):
+        """Max link utilization at every time step of a capacity trace (see traces.py), window by window.
+
+        Links without capacity (NaN) are ignored, links down (capacity 0) with load give inf.
+        Raises a ValueError if the trace has different links or there is not one traffic matrix per time step.
+        :param trace: A CapacityTrace of the topology
+        :param traffic_matrices: One (T, T) array for all time steps, a (timesteps, T, T) array with one per time step
+            or a file of one matrix per time step (see iter_traffic_matrices())
+        :param batch_size (optional, defaults to 256): How many time steps are evaluated at once
+        :return: A (timesteps,) array holding the max link utilization of every time step
+        """
+
+        trace.check(self.topology)
+        t = self.tor_count
+        if isinstance(traffic_matrices, (str, os.PathLike)):
+            batches = iter_traffic_matrices(traffic_matrices, batch_size, (t, t))
+        else:
+            traffic_matrices = np.asarray(traffic_matrices, dtype=float)
+            if traffic_matrices.ndim == 2:
+                # The same loads for every time step, only the capacities change
+                loads = self.link_loads(traffic_matrices)
+                batches = None
+            else:
+                batches = (traffic_matrices[start:start + batch_size] for start in range(0, len(traffic_matrices), batch_size))
+        results = [np.zeros(0)]
+        for _, capacities in trace.iter_windows(batch_size):
+            if batches is not None:
+                batch = next(batches, None)
+                if batch is None or len(batch) != capacities.shape[1]:
+                    raise ValueError("Expected one traffic matrix per time step of the trace (%d)" % trace.timesteps)
+                loads = self.link_loads(batch)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                results.append(np.nanmax(loads / capacities, axis=0))
+        if batches is not None and next(batches, None) is not None:
+            raise ValueError("Expected one traffic matrix per time step of the trace (%d)" % trace.timesteps)
+        return np.concatenate(results)
+
+
+def iter_traffic_matrices(path, batch_size=256, shape=None, dtype=np.float64):
+    """Stream batches of traffic matrices from a memory-mapped file, only the current batch is read into memory.
+
+    :param path: A .npy file holding a (B, T, T) array, or a raw binary file of T x T matrices (then shape is required)
+    :param batch_size (optional, defaults to 256): How many traffic matrices per batch
+    :param shape (optional): (T, T), the shape of a single matrix in a raw file
+    :param dtype (optional, defaults to float64): Data type of a raw file
+    :return: A generator of (b, T, T) arrays
+    """
+
+    if str(path).endswith('.npy'):
+        matrices = np.load(path, mmap_mode='r')
+    else:
+        if shape is None:
+            raise ValueError("The shape of the traffic matrices is needed to read a raw file")
+        matrices = np.memmap(path, dtype=dtype, mode='r').reshape((-1,) + tuple(shape))
+    for start in range(0, len(matrices), batch_size):
+        yield np.array(matrices[start:start + batch_size])
+
+
+# Routing matrices are built once per topology, keyed by fingerprint
+_routing_cache = FingerprintCache()
+
+
+def routing_matrix(topology):
+    """The routing matrix of a topology, built on first use and shared by structurally identical topologies.
+
+    :param topology: The topology object
+    :return: A RoutingMatrix
+    """
+
+    return _routing_cache.get(topology, lambda: RoutingMatrix(topology))
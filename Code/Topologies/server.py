@@ -0,0 +1,409 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from collections import Counter
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import scipy.sparse as sp
+
+from .topology import Topology
+from .util import gen_graph_from_edges
+from .edge_index import EdgeIndex
+from .fatTree import FatTree
+from .fabric import Fabric
+from .jupiter import Jupiter
+from .jupiter_blocks import Jupiter_bl
+from .jellyfish import Jellyfish
+from .xpander import Xpander
+
+#####                   #####
+####                     ####
+###    Topology server    ###
+####                     ####
+#####                   #####
+
+# One server per host generates every requested topology once into multiprocessing.shared_memory blocks: the links
+# (gen_edges()), a CSR adjacency in the format of routing.switch_adjacency(), the capacities of gen_links() and the layer
+# ranges. Clients ask for a topology by descriptor over a Unix socket (one JSON object per line) and map the blocks
+# without copying them. The server counts the clients holding every topology and frees its blocks once the last one
+# detached or disconnected, so the memory use doesn't grow with the number of workers.
+#
+# Protocol: {"op": "attach", "descriptor": "Fabric_3_2_4_48"} -> {"ok": true, "descriptor": ..., "layers": [[first, last], ...],
+#           "arrays": {name: {"shm": block name, "dtype": ..., "shape": [...]}}}
+#           {"op": "detach", "descriptor": ...} -> {"ok": true}
+#           Errors are answered with {"ok": false, "error": message}.
+
+# Topologies the server can build, a descriptor is the name followed by the integer arguments of the constructor
+TOPOLOGIES = {
+    "FatTree": FatTree,
+    "Fabric": Fabric,
+    "Jupiter": Jupiter,
+    "Jupiter_bl": Jupiter_bl,
+    "Jellyfish": Jellyfish,
+    "Xpander": Xpander,
+}
+
+
+def parse_descriptor(descriptor, topologies=TOPOLOGIES):
+    """Split a descriptor into topology class and constructor arguments, e.g. "Fabric_3_2_4_48" -> Fabric, [3, 2, 4, 48].
+
+    Raises a ValueError if the descriptor doesn't describe a known topology.
+    :param descriptor: The descriptor string
+    :param topologies (optional, defaults to TOPOLOGIES): Dict of names and topology classes
+    :return: The class and the list of arguments
+    """
+
+    # Longest name first, "Jupiter_bl_..." is not a "Jupiter"
+    for name in sorted(topologies, key=len, reverse=True):
+        if descriptor == name or descriptor.startswith(name + "_"):
+            arguments = descriptor[len(name) + 1:].split("_") if descriptor != name else []
+            if not all(argument.isdigit() for argument in arguments):
+                raise ValueError("Can't rebuild %s from its descriptor" % descriptor)
+            return topologies[name], [int(argument) for argument in arguments]
+    raise ValueError("Unknown topology %s, choose from %s" % (descriptor, ", ".join(sorted(topologies))))
+
+
+# Guards the temporary switch-off of the resource tracker in attach_block()
+_tracker_lock = threading.Lock()
+
+
+def attach_block(name):
+    """Map an existing shared memory block without registering it with the resource tracker, which would free the
+    block when this process exits (the server owns the blocks)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers. Unregistering afterwards isn't an option: forked workers share the
+        # tracker of the server, which would then lose the server's own registration.
+        with _tracker_lock:
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args: None
+            try:
+                return shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+
+
+class SharedEntry:
+    """The shared memory blocks of one topology and the number of clients holding it"""
+
+    def __init__(self, topology):
+        """
+
+        :param topology: The topology object to publish
+        """
+
+        edges = topology.gen_edges()
+        links = topology.gen_links()
+        n = topology.indices[-1][-1]
+        adjacency = sp.csr_matrix((np.arange(1, len(links) + 1), (links[:, 0] - 1, links[:, 1] - 1)), shape=(n, n))
+        arrays = {"edges": edges, "indptr": adjacency.indptr, "indices": adjacency.indices, "data": adjacency.data}
+        capacities = topology.gen_capacities(links)
+        if capacities is not None:
+            arrays["capacities"] = capacities
+
+        self.blocks = []
+        self.manifest = {"ok": True, "descriptor": topology.descriptor,
+                         "layers": [[layer[0], layer[-1]] for layer in topology.indices], "arrays": {}}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.manifest["arrays"][name] = {"shm": block.name, "dtype": array.dtype.str, "shape": list(array.shape)}
+        self.references = 0
+
+    def free(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+class TopologyServer:
+    """Serves topologies from shared memory to local clients over a Unix socket"""
+
+    def __init__(self, socket_path, capacity_function=None, topologies=None):
+        """
+
+        :param socket_path: Path of the Unix socket to listen on
+        :param capacity_function (optional, defaults to None): Capacity function given to every topology built
+        :param topologies (optional, defaults to TOPOLOGIES): Dict of names and topology classes which can be requested
+        """
+
+        self.socket_path = socket_path
+        self.capacity_function = capacity_function
+        self.topologies = TOPOLOGIES if topologies is None else topologies
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                held = Counter()
+                try:
+                    for line in self.rfile:
+                        reply = server.handle_request(json.loads(line), held)
+                        self.wfile.write((json.dumps(reply) + "\n").encode())
+                finally:
+                    # A client going away releases everything it held
+                    for descriptor, count in held.items():
+                        for _ in range(count):
+                            server.release(descriptor)
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+        self.server.daemon_threads = True
+
+    def acquire(self, descriptor):
+        """Build a topology into shared memory if needed and count one more client holding it.
+
+        Raises a ValueError for descriptors that can't be built.
+        :param descriptor: The descriptor of the topology
+        :return: The manifest of its shared memory blocks
+        """
+
+        with self.lock:
+            entry = self.entries.get(descriptor)
+            if entry is None:
+                cls, arguments = parse_descriptor(descriptor, self.topologies)
+                topology = cls(*arguments, capacity_function=self.capacity_function)
+                entry = SharedEntry(topology)
+                self.entries[descriptor] = entry
+            entry.references += 1
+            return entry.manifest
+
+    def release(self, descriptor):
+        """Count one client less holding a topology, its blocks are freed when no client is left.
+
+        :param descriptor: The descriptor of the topology
+        """
+
+        with self.lock:
+            entry = self.entries.get(descriptor)
+            if entry is None:
+                return
+            entry.references -= 1
+            if entry.references <= 0:
+                entry.free()
+                del self.entries[descriptor]
+
+    def handle_request(self, request, held):
+        """Answer one request of a client.
+
+        :param request: The decoded request
+        :param held: Counter of the descriptors held by this client, updated
+        :return: The reply as a dict
+        """
+
+        op = request.get("op")
+        descriptor = request.get("descriptor")
+        try:
+            if op == "attach":
+                manifest = self.acquire(descriptor)
+                held[descriptor] += 1
+                return manifest
+            if op == "detach":
+                if held[descriptor] > 0:
+                    held[descriptor] -= 1
+                    self.release(descriptor)
+                return {"ok": True}
+            if op == "status":
+                with self.lock:
+                    return {"ok": True, "topologies": {d: e.references for d, e in self.entries.items()}}
+            return {"ok": False, "error": "Unknown operation %s" % op}
+        except (ValueError, TypeError) as e:
+            # TypeError: wrong number of arguments in the descriptor
+            return {"ok": False, "error": str(e)}
+
+    def serve_forever(self):
+        """Serve clients until shutdown() is called"""
+        self.server.serve_forever()
+
+    def start(self):
+        """Serve clients in a background thread.
+
+        :return: The server itself
+        """
+
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def shutdown(self):
+        """Stop serving, free all shared memory blocks and remove the socket"""
+        if self.thread is not None:
+            self.server.shutdown()
+            self.thread.join()
+            self.thread = None
+        self.server.server_close()
+        with self.lock:
+            for entry in self.entries.values():
+                entry.free()
+            self.entries = {}
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+class SharedTopology(Topology):
+    """A topology mapped from a TopologyServer. The arrays are read-only views of the shared memory blocks,
+    so gen_edges() and adjacency() don't copy anything."""
+
+    # gen_graph() is built from gen_edges()
+    graph_from_edges = True
+
+    def __init__(self, client, manifest):
+        """
+
+        :param client: The TopologyClient the topology was attached through
+        :param manifest: The reply of the server to the attach request
+        """
+
+        super().__init__([range(first, last + 1) for first, last in manifest["layers"]], manifest["descriptor"], None)
+        self.client = client
+        self.blocks = {}
+        self.arrays = {}
+        for name, spec in manifest["arrays"].items():
+            block = attach_block(spec["shm"])
+            array = np.ndarray(tuple(spec["shape"]), dtype=np.dtype(spec["dtype"]), buffer=block.buf)
+            array.flags.writeable = False
+            self.blocks[name] = block
+            self.arrays[name] = array
+        self.capacities = self.arrays.get("capacities")
+        # For the capacity lookups of gen_capacities()
+        self.index = EdgeIndex(self)
+
+    def gen_edges(self):
+        return self.arrays["edges"]
+
+    def gen_capacities(self, links=None):
+        """Capacities of directed links, looked up in the shared capacities of gen_links() (the capacity function stays
+        with the server).
+
+        :param links (optional, defaults to gen_links()): A (L, 2) array of (source, destination) switch IDs
+        :return: A float array with the capacity of every link (NaN for unknown links), or None if the server has no capacity function
+        """
+
+        if self.capacities is None or links is None:
+            return self.capacities
+        links = np.asarray(links)
+        ids = self.index.link_ids(links[:, 0], links[:, 1])
+        return np.where(ids >= 0, self.capacities[np.maximum(ids, 0)], np.nan)
+
+    def adjacency(self):
+        """Sparse adjacency matrix in the format of routing.switch_adjacency(), sharing the memory of the server.
+
+        :return: An (N, N) scipy.sparse CSR matrix holding link index + 1 for every link of gen_links()
+        """
+
+        n = self.indices[-1][-1]
+        return sp.csr_matrix((self.arrays["data"], self.arrays["indices"], self.arrays["indptr"]), shape=(n, n), copy=False)
+
+    def gen_graph(self):
+        """Constructs a Networkx Graph from the shared links (a private copy).
+
+        :return: A networkx DiGraph of the topology
+        """
+
+        G = gen_graph_from_edges(self.gen_edges(), *[len(layer) for layer in self.indices])
+        if self.capacities is not None:
+            links = self.gen_links()
+            for (u, v), capacity in zip(links.tolist(), self.capacities.tolist()):
+                G.edges[u, v]['capacity'] = capacity
+        return G
+
+    def close(self):
+        """Unmap the shared memory and tell the server this client is done with the topology.
+        The arrays must not be used afterwards."""
+
+        if not self.blocks:
+            return
+        self.arrays = {}
+        self.capacities = None
+        for block in self.blocks.values():
+            block.close()
+        self.blocks = {}
+        self.client.request({"op": "detach", "descriptor": self.descriptor})
+
+
+class TopologyClient:
+    """Connection of a worker process to a TopologyServer"""
+
+    def __init__(self, socket_path):
+        """
+
+        :param socket_path: Path of the Unix socket of the server
+        """
+
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socket_path)
+        self.stream = self.socket.makefile("rwb")
+        self.lock = threading.Lock()
+
+    def request(self, request):
+        """Send a request and wait for the reply.
+
+        Raises a ValueError if the server reports an error.
+        :param request: The request as a dict
+        :return: The reply as a dict
+        """
+
+        with self.lock:
+            self.stream.write((json.dumps(request) + "\n").encode())
+            self.stream.flush()
+            reply = json.loads(self.stream.readline())
+        if not reply.get("ok"):
+            raise ValueError(reply.get("error"))
+        return reply
+
+    def attach(self, descriptor):
+        """Map a topology from the server, which builds it on the first request.
+
+        :param descriptor: Descriptor of the topology, e.g. "Jupiter_256_64"
+        :return: A SharedTopology, close() it when done
+        """
+        return SharedTopology(self, self.request({"op": "attach", "descriptor": descriptor}))
+
+    def close(self):
+        """Disconnect, the server releases all topologies still held by this client"""
+        self.stream.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve topologies from shared memory to local worker processes")
+    parser.add_argument("socket", help="Path of the Unix socket to listen on")
+    args = parser.parse_args()
+    server = TopologyServer(args.socket)
+    # Free the shared memory on kill as well
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
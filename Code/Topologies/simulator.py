@@ -0,0 +1,469 @@
+import heapq
+import numpy as np
+from scipy.sparse.csgraph import shortest_path
+from .routing import routing_matrix, switch_adjacency
+
+#####                         #####
+####                           ####
+###    Flow level simulation    ###
+####                           ####
+#####                         #####
+
+# Flows run between ToRs. Every flow is hashed onto one of its ECMP paths when the simulation starts. On every arrival
+# and departure only the flows whose max-min fair rate can change are filled again (see FlowState), the others keep
+# their rates. Sizes are in capacity units times time units (e.g. Gbit with capacities in Gbit/s and time in s).
+
+# Event kinds, departures are handled before arrivals at the same time and capacity changes (see traces.py) last
+DEPARTURE = 0
+ARRIVAL = 1
+CAPACITY = 2
+
+
+def mix_hash(values, salt):
+    """Vectorized 64 bit integer hash (splitmix64 finalizer) of an array of integers"""
+    with np.errstate(over='ignore'):
+        x = np.asarray(values, dtype=np.uint64) + np.uint64(salt) * np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def max_min_rates(paths, capacities):
+    """Max-min fair rates of a set of flows (progressive filling): all unfrozen flows grow at the same pace,
+    flows crossing a link that runs full are frozen at their current rate.
+
+    Every round freezes the links with the lowest fill level at once, as long as they share no flows: freezing flows only
+    raises the fill level of the other links, so this gives the same rates as filling link by link in fewer rounds.
+    :param paths: An (F, H) array with the link IDs of every flow, padded with -1
+    :param capacities: Capacity of every link, inf for unlimited links
+    :return: An (F,) array of rates, inf for flows without links or only on unlimited links
+    """
+
+    rates = np.full(len(paths), np.inf)
+    on_link = paths >= 0
+    # One entry per (flow, link) of the unfrozen flows, grouped by flow, links numbered compactly
+    flows = np.nonzero(on_link)[0]
+    links, compact = np.unique(paths[on_link], return_inverse=True)
+    capacity = capacities[links].astype(float)
+    limited = np.isfinite(capacity)
+    frozen_load = np.zeros(len(links))
+    fill = np.full(len(links), np.inf)
+    frozen = np.zeros(len(paths), dtype=bool)
+    while len(flows):
+        counts = np.bincount(compact, minlength=len(links))
+        candidates = np.flatnonzero(limited & (counts > 0))
+        if len(candidates) == 0:
+            # Only unlimited links left
+            break
+        # Rate up to which the unfrozen flows of a link can grow before it runs full
+        fill[candidates] = (capacity[candidates] - frozen_load[candidates]) / counts[candidates]
+        order = candidates[np.argsort(fill[candidates], kind='stable')]
+        position = np.full(len(links), len(links))
+        position[order] = np.arange(len(order))
+        entry_position = position[compact]
+        # Lowest position of the links of every flow, spread back over its entries
+        starts = np.flatnonzero(np.concatenate(([True], flows[1:] != flows[:-1])))
+        first = np.repeat(np.minimum.reduceat(entry_position, starts), np.diff(np.append(starts, len(flows))))
+        # The links before the first one sharing a flow with a lower link are bottlenecks at their fill level
+        stop = entry_position[entry_position > first].min(initial=len(order))
+        bottleneck = entry_position < stop
+        # Freeze the flows crossing a bottleneck and drop their entries
+        newly_frozen = flows[bottleneck]
+        rates[newly_frozen] = fill[compact[bottleneck]]
+        frozen[newly_frozen] = True
+        leaving = frozen[flows]
+        frozen_load += np.bincount(compact[leaving], weights=rates[flows[leaving]], minlength=len(links))
+        flows = flows[~leaving]
+        compact = compact[~leaving]
+    return rates
+
+
+def saturation_level(rates, capacity):
+    """Level at which a link runs full when one more flow joins it: the smallest x with sum(min(rates, x)) + x >= capacity.
+    In progressive filling with the new flow, the flows below this level freeze exactly as before.
+
+    :param rates: List of the max-min fair rates of the flows on the link
+    :param capacity: Capacity of the link
+    :return: The level
+    """
+
+    below = 0.0
+    n = len(rates)
+    # With the k slowest flows below x: sum of their rates + x * (n - k + 1) = capacity, valid up to the next rate
+    for k, rate in enumerate(sorted(rates)):
+        level = (capacity - below) / (n + 1 - k)
+        if level <= rate:
+            return level
+        below += rate
+    return capacity - below
+
+
+def progressive_filling(flow_links, capacity):
+    """Max-min fair rates like max_min_rates(), for a few flows: the links are taken in order of their fill level from a
+    heap and only the links of the frozen flows are updated, so a round doesn't touch all links.
+
+    :param flow_links: List with a tuple of link IDs for every flow (limited links only)
+    :param capacity: Dict of the capacity of every link of the flows
+    :return: A list of rates, inf for flows without links
+    """
+
+    members = {}
+    for i, links in enumerate(flow_links):
+        for link in links:
+            members.setdefault(link, []).append(i)
+    unfrozen = {link: len(flows) for link, flows in members.items()}
+    frozen_load = dict.fromkeys(members, 0.0)
+    heap = [(capacity[link] / n, link) for link, n in unfrozen.items()]
+    heapq.heapify(heap)
+    rates = [np.inf] * len(flow_links)
+    frozen = [False] * len(flow_links)
+    while heap:
+        level, link = heapq.heappop(heap)
+        n = unfrozen[link]
+        # Fill levels only grow, outdated entries come first and are skipped
+        if n == 0 or (capacity[link] - frozen_load[link]) / n != level:
+            continue
+        for i in members[link]:
+            if frozen[i]:
+                continue
+            frozen[i] = True
+            rates[i] = level
+            for other in flow_links[i]:
+                unfrozen[other] -= 1
+                frozen_load[other] += level
+                if other != link and unfrozen[other]:
+                    heapq.heappush(heap, ((capacity[other] - frozen_load[other]) / unfrozen[other], other))
+    return rates
+
+
+class FlowSimulator:
+    """Flow level discrete event simulator with ECMP path hashing and max-min fair rates"""
+
+    def __init__(self, topology, seed=0):
+        """
+
+        :param topology: The topology object to simulate. Link capacities come from its capacity function (1 if there is none,
+            links where it returns None are unlimited).
+        :param seed (optional, defaults to 0): Salt of the ECMP hash
+        """
+
+        self.topology = topology
+        self.seed = seed
+        self.links = topology.gen_links()
+        capacities = topology.gen_capacities(self.links)
+        self.capacities = np.ones(len(self.links)) if capacities is None else np.where(np.isnan(capacities), np.inf, capacities)
+        self.adjacency = switch_adjacency(topology, self.links)
+        self.distances = None
+
+    def tor_distances(self):
+        """Hop distances from every switch to every ToR, computed on first use.
+
+        :return: A (T, N) int16 array, row i belongs to the i-th ToR, column j to switch ID j + 1
+        """
+
+        if self.distances is None:
+            tors = np.asarray(self.topology.indices[0]) - 1
+            self.distances = np.empty((len(tors), self.adjacency.shape[0]), dtype=np.int16)
+            for first in range(0, len(tors), 256):
+                batch = shortest_path(self.adjacency, unweighted=True, indices=tors[first:first + 256])
+                self.distances[first:first + 256] = np.where(np.isinf(batch), -1, batch)
+        return self.distances
+
+    def ecmp_paths(self, sources, destinations, flow_ids=None):
+        """Hash flows onto ECMP paths: at every hop a flow picks one of the links that bring it closer to its destination.
+
+        :param sources: Array of source ToR IDs
+        :param destinations: Array of destination ToR IDs
+        :param flow_ids (optional, defaults to 0 ... F-1): Array of flow identifiers fed into the hash
+        :return: An (F, H) int64 array of link IDs (rows of gen_links()) per flow, padded with -1
+        """
+
+        distances = self.tor_distances()
+        indptr, neighbours, link_ids = self.adjacency.indptr, self.adjacency.indices, self.adjacency.data - 1
+        sources = np.asarray(sources, dtype=np.int64)
+        if flow_ids is None:
+            flow_ids = np.arange(len(sources))
+        target = np.asarray(destinations, dtype=np.int64) - self.topology.indices[0][0]
+        current = sources - 1
+        hops = int(distances[target, current].max()) if len(sources) else 0
+        paths = np.full((len(sources), hops), -1, dtype=np.int64)
+        for hop in range(hops):
+            moving = np.flatnonzero(distances[target, current] > 0)
+            at = current[moving]
+            # All neighbours of the current switches, grouped by flow
+            degree = indptr[at + 1] - indptr[at]
+            owner = np.repeat(np.arange(len(moving)), degree)
+            slot = np.arange(degree.sum()) - np.repeat(np.cumsum(degree) - degree, degree) + np.repeat(indptr[at], degree)
+            closer = distances[target[moving][owner], neighbours[slot]] == distances[target[moving][owner], at[owner]] - 1
+            slot = slot[closer]
+            choices = np.bincount(owner[closer], minlength=len(moving))
+            pick = (mix_hash(flow_ids[moving] * 64 + hop, self.seed) % choices.astype(np.uint64)).astype(np.int64)
+            chosen = slot[np.cumsum(choices) - choices + pick]
+            paths[moving, hop] = link_ids[chosen]
+            current[moving] = neighbours[chosen]
+        return paths
+
+    def run(self, arrivals, sources, destinations, sizes, trace=None):
+        """Simulate a workload.
+
+        Raises a ValueError if the trace has different links.
+        :param arrivals: Array of arrival times of the flows
+        :param sources: Array of source ToR IDs
+        :param destinations: Array of destination ToR IDs
+        :param sizes: Array of flow sizes
+        :param trace (optional, defaults to None): A CapacityTrace of the topology, time step i sets the capacities from
+            i * interval on (times in seconds then). Without one the capacities of the topology are used throughout.
+        :return: An array holding the completion time (finish - arrival) of every flow, NaN for flows that never finish
+            because links on their paths are down (capacity 0) at the end of the trace
+        """
+
+        arrivals = np.asarray(arrivals, dtype=float)
+        sizes = np.asarray(sizes, dtype=float)
+        paths = self.ecmp_paths(sources, destinations)
+        order = np.argsort(arrivals, kind='stable')
+        finish = np.full(len(arrivals), np.nan)
+        state = FlowState(self.capacities)
+
+        # Arrivals are sorted, so only the next one has to sit in the heap. The same holds for the capacity changes.
+        # Departures sit in the heap with the version of their flow's rate and are skipped once it changed.
+        events = [(arrivals[order[0]], ARRIVAL, 0, 0)] if len(order) else []
+        if trace is not None:
+            trace.check(self.topology)
+            window = None
+            heapq.heappush(events, (0.0, CAPACITY, 0, 0))
+        pending = len(order)
+        while events:
+            time, kind, ref, version = heapq.heappop(events)
+            if kind == DEPARTURE:
+                if state.version[ref] != version:
+                    continue
+                finish[state.flow[ref]] = time
+                changed = state.remove(ref, time)
+            elif kind == ARRIVAL:
+                flow = order[ref]
+                pending -= 1
+                if ref + 1 < len(order):
+                    heapq.heappush(events, (arrivals[order[ref + 1]], ARRIVAL, ref + 1, 0))
+                changed = state.add(flow, paths[flow][paths[flow] >= 0].tolist(), sizes[flow], time)
+            else:
+                # Read the trace a chunk at a time, a single time step is spread over all rows of a chunk
+                if ref % trace.chunk_size == 0:
+                    window = trace.window(ref, min(ref + trace.chunk_size, trace.timesteps))
+                capacities = window[:, ref % trace.chunk_size]
+                if ref + 1 < trace.timesteps and (pending or state.active):
+                    heapq.heappush(events, ((ref + 1) * trace.interval, CAPACITY, ref + 1, 0))
+                changed = state.set_capacities(np.where(np.isnan(capacities), np.inf, capacities), time)
+            for slot in changed:
+                # Flows stalled on links down only continue after a capacity change
+                if state.rates[slot] > 0:
+                    heapq.heappush(events, (time + state.remaining[slot] / state.rates[slot], DEPARTURE, slot, state.version[slot]))
+            if len(events) > 4 * (state.active + 256):
+                # Drop the outdated departures
+                events = [event for event in events if event[1] != DEPARTURE or state.version[event[2]] == event[3]]
+                heapq.heapify(events)
+        return finish - arrivals
+
+
+class FlowState:
+    """Max-min fair rates of the active flows, updated flow by flow.
+
+    The flows live in slots which are reused after a departure. Every link with limited capacity keeps the set of slots
+    crossing it. The remaining size of a flow is only brought up to date when its rate changes.
+    After an arrival, the flows below the level at which the new flow fills one of its links first keep their rates; after a
+    departure the flows slower than the leaving one (none of its links ran full below its rate). Only the faster flows
+    coupled to the links of the arriving or leaving flow through other fast flows are filled again, on the capacity the
+    slow flows leave.
+    """
+
+    def __init__(self, capacities):
+        """
+
+        :param capacities: Capacity of every link, inf for unlimited links
+        """
+
+        self.capacities = capacities.tolist()
+        self.link_slots = [set() for _ in self.capacities]
+        # Per slot: flow, limited links, all links of its path, rate, remaining size at the time of the last update, that
+        # time, version of the rate
+        self.flow = []
+        self.links = []
+        self.all_links = []
+        self.rates = []
+        self.remaining = []
+        self.updated = []
+        self.version = []
+        self.free = []
+        self.active = 0
+
+    def add(self, flow, links, size, time):
+        """A flow arrives.
+
+        :param flow: Index of the flow
+        :param links: List of the link IDs of its path
+        :param size: Size of the flow
+        :param time: Current time
+        :return: List of the slots whose rate changed
+        """
+
+        limited = tuple(link for link in links if self.capacities[link] < np.inf)
+        threshold = min((saturation_level([self.rates[slot] for slot in self.link_slots[link]], self.capacities[link])
+                         for link in limited), default=np.inf)
+        if self.free:
+            slot = self.free.pop()
+            self.flow[slot], self.links[slot], self.all_links[slot] = flow, limited, links
+            self.rates[slot], self.remaining[slot], self.updated[slot] = np.inf, size, time
+        else:
+            slot = len(self.flow)
+            for values, value in ((self.flow, flow), (self.links, limited), (self.all_links, links), (self.rates, np.inf),
+                                  (self.remaining, size), (self.updated, time), (self.version, 0)):
+                values.append(value)
+        for link in limited:
+            self.link_slots[link].add(slot)
+        self.active += 1
+        changed = self.refill(limited, threshold, time)
+        if slot not in changed:
+            # Only on unlimited links
+            changed.append(slot)
+            self.version[slot] += 1
+        return changed
+
+    def remove(self, slot, time):
+        """A flow leaves.
+
+        :param slot: Its slot
+        :param time: Current time
+        :return: List of the slots whose rate changed
+        """
+
+        for link in self.links[slot]:
+            self.link_slots[link].discard(slot)
+        threshold = self.rates[slot]
+        self.version[slot] += 1
+        self.free.append(slot)
+        self.active -= 1
+        return self.refill(self.links[slot], threshold, time) if threshold < np.inf else []
+
+    def refill(self, links, threshold, time):
+        """New rates for the flows at or above a threshold rate that are coupled to some links through such flows.
+
+        :param links: The links of the arriving or leaving flow
+        :param threshold: Flows below this rate keep their rates
+        :param time: Current time
+        :return: List of the slots whose rate changed
+        """
+
+        # Some tolerance, flows frozen at the same level as the threshold may be off by rounding
+        threshold = threshold * (1 - 1e-9)
+        affected = []
+        seen = set()
+        capacity = {}
+        stack = list(links)
+        visited = set()
+        while stack:
+            link = stack.pop()
+            if link in visited:
+                continue
+            visited.add(link)
+            # Capacity left by the flows keeping their rates
+            load = 0.0
+            for slot in self.link_slots[link]:
+                rate = self.rates[slot]
+                if rate < threshold:
+                    load += rate
+                elif slot not in seen:
+                    seen.add(slot)
+                    affected.append(slot)
+                    stack.extend(self.links[slot])
+            capacity[link] = max(self.capacities[link] - load, 0.0)
+        return self.update(affected, progressive_filling([self.links[slot] for slot in affected], capacity), time)
+
+    def update(self, slots, rates, time):
+        """Set new rates, bringing the remaining sizes up to date first.
+
+        :return: List of the slots whose rate changed
+        """
+
+        changed = []
+        for slot, rate in zip(slots, rates):
+            old = self.rates[slot]
+            if rate == old:
+                continue
+            if time > self.updated[slot]:
+                self.remaining[slot] -= old * (time - self.updated[slot])
+            self.updated[slot] = time
+            self.rates[slot] = rate
+            self.version[slot] += 1
+            changed.append(slot)
+        return changed
+
+    def set_capacities(self, capacities, time):
+        """New capacities for all links, all rates are computed again.
+
+        :param capacities: Array of capacities, inf for unlimited links
+        :param time: Current time
+        :return: List of the slots whose rate changed
+        """
+
+        self.capacities = capacities.tolist()
+        free = set(self.free)
+        slots = [slot for slot in range(len(self.flow)) if slot not in free]
+        for link_slots in self.link_slots:
+            link_slots.clear()
+        paths = np.full((len(slots), max((len(self.all_links[slot]) for slot in slots), default=0)), -1, dtype=np.int64)
+        for i, slot in enumerate(slots):
+            self.links[slot] = tuple(link for link in self.all_links[slot] if self.capacities[link] < np.inf)
+            for link in self.links[slot]:
+                self.link_slots[link].add(slot)
+            paths[i, :len(self.all_links[slot])] = self.all_links[slot]
+        return self.update(slots, max_min_rates(paths, capacities).tolist(), time)
+
+
+def saturation_throughput(topology):
+    """Total rate of uniform traffic between distinct ToRs at which the most utilized link runs full under ECMP
+    (equal splitting over the shortest paths). Links without capacity are ignored.
+
+    Raises a ValueError if no link on the paths between the ToRs has a capacity.
+    :param topology: The topology object
+    :return: The rate
+    """
+
+    routing = routing_matrix(topology)
+    uniform = np.ones((routing.tor_count, routing.tor_count)) - np.eye(routing.tor_count)
+    with np.errstate(invalid='ignore'):
+        utilization = np.nanmax(routing.utilization(uniform / uniform.sum()), initial=0.0)
+    if not utilization > 0:
+        raise ValueError("No link between the ToRs of %s has a capacity" % topology.descriptor)
+    return 1.0 / utilization
+
+
+def poisson_workload(topology, flow_count, load=0.5, mean_size=1.0, size_distribution="exponential", pareto_shape=1.2, seed=None):
+    """Seeded workload of flows between random pairs of distinct ToRs with Poisson arrivals.
+
+    Raises a ValueError for an unknown size distribution or if no link between the ToRs has a capacity.
+    :param topology: The topology object
+    :param flow_count: How many flows to generate
+    :param load (optional, defaults to 0.5): Offered load relative to saturation_throughput(), sets the arrival rate. Above 1
+        the most utilized links get more traffic than they carry and the flows in flight pile up without bound.
+    :param mean_size (optional, defaults to 1.0): Mean flow size
+    :param size_distribution (optional, defaults to "exponential"): "exponential", "pareto" (heavy tailed) or "fixed"
+    :param pareto_shape (optional, defaults to 1.2): Shape parameter of the Pareto distribution (> 1)
+    :param seed (optional): Seed of the random number generator
+    :return: Four arrays (arrival times, source ToR IDs, destination ToR IDs, sizes)
+    """
+
+    rng = np.random.default_rng(seed)
+    arrival_rate = load * saturation_throughput(topology) / mean_size
+    arrivals = np.cumsum(rng.exponential(1.0 / arrival_rate, flow_count))
+    tors = len(topology.indices[0])
+    sources = rng.integers(0, tors, flow_count)
+    destinations = (sources + rng.integers(1, tors, flow_count)) % tors
+    if size_distribution == "exponential":
+        sizes = rng.exponential(mean_size, flow_count)
+    elif size_distribution == "pareto":
+        sizes = (rng.pareto(pareto_shape, flow_count) + 1) * mean_size * (pareto_shape - 1) / pareto_shape
+    elif size_distribution == "fixed":
+        sizes = np.full(flow_count, float(mean_size))
+    else:
+        raise ValueError("Unknown size distribution %s" % size_distribution)
+    first = topology.indices[0][0]
+    return arrivals, sources + first, destinations + first, sizes
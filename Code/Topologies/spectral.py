@@ -0,0 +1,171 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import eigsh, lobpcg
+from .topology import FingerprintCache
+
+#####                    #####
+####                      ####
+###    Spectral metrics    ###
+####                      ####
+#####                    #####
+
+# All metrics treat the topology as an undirected, unweighted graph built straight from Topology.gen_edges().
+# Only the few extremal eigenpairs are computed with sparse eigensolvers (ARPACK or LOBPCG), never the full spectrum.
+# The Fiedler vector comes from LOBPCG by default. ARPACK in shift-invert mode needs a sparse LU factorization of the
+# Laplacian, whose fill-in explodes on expander-like graphs (Jellyfish, Xpander): 18 s against 0.3 s for 5000 switches.
+# Results are cached per topology fingerprint.
+
+_cache = FingerprintCache()
+
+
+def adjacency_matrix(topology):
+    """Symmetric sparse adjacency matrix, row/column i belongs to switch ID i + 1.
+
+    :param topology: The topology object
+    :return: An (N, N) scipy.sparse CSR matrix of floats
+    """
+
+    edges = topology.gen_edges() - 1
+    n = topology.indices[-1][-1]
+    ones = np.ones(2 * len(edges))
+    return sp.csr_matrix((ones, (np.concatenate((edges[:, 0], edges[:, 1])), np.concatenate((edges[:, 1], edges[:, 0])))), shape=(n, n))
+
+
+def laplacian(topology, normalized=False):
+    """Sparse graph Laplacian L = D - A (or I - D^-1/2 A D^-1/2 if normalized).
+
+    :param topology: The topology object
+    :param normalized (optional, defaults to False): Return the normalized Laplacian
+    :return: An (N, N) scipy.sparse CSR matrix
+    """
+
+    adjacency = adjacency_matrix(topology)
+    degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    if not normalized:
+        return (sp.diags(degrees) - adjacency).tocsr()
+    scale = sp.diags(1.0 / np.sqrt(np.maximum(degrees, 1)))
+    return (sp.identity(len(degrees)) - scale @ adjacency @ scale).tocsr()
+
+
+def smallest_nontrivial_eigenpair(matrix, method="auto", seed=0):
+    """Second smallest eigenvalue and eigenvector of a Laplacian.
+
+    :param matrix: A sparse symmetric positive semi-definite matrix with smallest eigenvalue 0
+    :param method (optional, defaults to "auto"): "lobpcg", "arpack" (shift-invert) or "auto" (lobpcg)
+    :param seed (optional, defaults to 0): Seed of the start vectors
+    :return: The eigenvalue and the eigenvector
+    """
+
+    n = matrix.shape[0]
+    if method == "auto":
+        method = "lobpcg"
+    rng = np.random.default_rng(seed)
+    if n < 8:
+        # Too small for the iterative solvers
+        values, vectors = np.linalg.eigh(matrix.toarray())
+        return values[1], vectors[:, 1]
+    if method == "arpack":
+        # Eigenvalues closest to a small negative shift: 0 and the one we want
+        values, vectors = eigsh(matrix.tocsc(), k=2, sigma=-1e-3, which='LM', v0=rng.random(n))
+        order = np.argsort(values)
+        return values[order[1]], vectors[:, order[1]]
+    if method == "lobpcg":
+        # Deflate the constant vector (eigenvalue 0) and use the diagonal as preconditioner
+        constant = np.ones((n, 1)) / np.sqrt(n)
+        preconditioner = sp.diags(1.0 / np.maximum(matrix.diagonal(), 1e-12))
+        values, vectors = lobpcg(matrix, rng.random((n, 2)), M=preconditioner, Y=constant, largest=False, tol=1e-6, maxiter=2000)
+        order = np.argsort(values)
+        return values[order[0]], vectors[:, order[0]]
+    raise ValueError("Unknown eigensolver %s" % method)
+
+
+def fiedler(topology, method="auto"):
+    """Second smallest eigenvalue of the Laplacian and its eigenvector (the Fiedler vector).
+
+    :param topology: The topology object
+    :param method (optional, see smallest_nontrivial_eigenpair()): Eigensolver to use
+    :return: The eigenvalue and the eigenvector
+    """
+    return _cache.get(topology, lambda: smallest_nontrivial_eigenpair(laplacian(topology), method), ("fiedler", method))
+
+
+def algebraic_connectivity(topology, method="auto"):
+    """Second smallest eigenvalue of the Laplacian (0 for disconnected topologies).
+
+    :param topology: The topology object
+    :param method (optional, see smallest_nontrivial_eigenpair()): Eigensolver to use
+    :return: A float
+    """
+    return float(fiedler(topology, method)[0])
+
+
+def spectral_gap(topology):
+    """Difference between the two largest eigenvalues of the adjacency matrix (equals the algebraic connectivity for regular graphs).
+
+    :param topology: The topology object
+    :return: A float
+    """
+
+    def compute():
+        adjacency = adjacency_matrix(topology)
+        if adjacency.shape[0] < 8:
+            values = np.linalg.eigvalsh(adjacency.toarray())[-2:]
+        else:
+            values = eigsh(adjacency, k=2, which='LA', return_eigenvectors=False)
+        return float(values.max() - values.min())
+    return _cache.get(topology, compute, "spectral_gap")
+
+
+def sweep_cut(adjacency, order):
+    """Best cut among all prefixes of an ordering of the switches (vectorized).
+
+    :param adjacency: Symmetric sparse adjacency matrix
+    :param order: Permutation of the switches (e.g. sorted by Fiedler vector entry)
+    :return: The edge expansion |E(S, V \\ S)| / |S| of the best prefix S with |S| <= N / 2 and the size of S
+    """
+
+    n = adjacency.shape[0]
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    coo = sp.triu(adjacency, k=1).tocoo()
+    degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    # An edge is internal to the prefix once both of its ends are in it
+    internal = np.cumsum(np.bincount(np.maximum(rank[coo.row], rank[coo.col]), minlength=n))
+    cut = np.cumsum(degrees[order]) - 2 * internal
+    sizes = np.arange(1, n + 1)
+    half = n // 2
+    expansion = cut[:half] / sizes[:half]
+    best = int(np.argmin(expansion))
+    return float(expansion[best]), best + 1
+
+
+def edge_expansion(topology, method="auto"):
+    """Bounds on the edge expansion h = min over |S| <= N / 2 of |E(S, V \\ S)| / |S|.
+
+    The lower bound is the Cheeger bound lambda_2 / 2, the upper bound the best sweep cut along the Fiedler vector
+    (an actual cut, so also a valid upper bound).
+    :param topology: The topology object
+    :param method (optional, see smallest_nontrivial_eigenpair()): Eigensolver to use
+    :return: A tuple (lower bound, upper bound, size of the cut set)
+    """
+
+    def compute():
+        value, vector = fiedler(topology, method)
+        upper, size = sweep_cut(adjacency_matrix(topology), np.argsort(vector, kind='stable'))
+        return float(value) / 2.0, upper, size
+    return _cache.get(topology, compute, ("edge_expansion", method))
+
+
+def spectral_metrics(topology, method="auto"):
+    """All spectral metrics of a topology.
+
+    :param topology: The topology object
+    :param method (optional, see smallest_nontrivial_eigenpair()): Eigensolver to use
+    :return: A dict with algebraic_connectivity, spectral_gap, edge_expansion_lower and edge_expansion_upper
+    """
+
+    lower, upper, _ = edge_expansion(topology, method)
+    return {"algebraic_connectivity": algebraic_connectivity(topology, method),
+            "spectral_gap": spectral_gap(topology),
+            "edge_expansion_lower": lower,
+            "edge_expansion_upper": upper}
@@ -0,0 +1,300 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import shortest_path
+from .routing import switch_adjacency
+from .simulator import mix_hash
+from .topology import FingerprintCache
+
+#####                     #####
+####                       ####
+###    Symmetry quotient    ###
+####                       ####
+#####                     #####
+
+# Pods, planes and blocks of the layered topologies are wired identically, so most switches have many structurally
+# identical twins. The switches are split into orbits starting from Topology.switch_classes() (derived from the index
+# structure), refined by color refinement until every switch of an orbit sees the same number of neighbours (over links of
+# the same capacity) in every orbit. Per-switch analyses then run once per orbit on a representative and are broadcast
+# back to all switches, per-link analyses once per link orbit.
+#
+# Color refinement yields the coarsest equitable partition below the candidate classes. That equals the automorphism orbits
+# for the topologies in this package, for other graphs it may be coarser (e.g. a random regular graph refined from a single
+# class), which is why topologies without a layered description start with one class per switch. verify() spot checks it.
+
+def relabel(*columns):
+    """Dense labels 0 ... K-1 of the distinct rows of some equally long integer columns (vectorized, no hashing)"""
+    order = np.lexsort(columns[::-1])
+    changed = np.zeros(len(order), dtype=bool)
+    for column in columns:
+        ordered = column[order]
+        changed[1:] |= ordered[1:] != ordered[:-1]
+    labels = np.empty(len(order), dtype=np.int64)
+    labels[order] = np.cumsum(changed)
+    return labels
+
+
+def by_first_member(labels):
+    """Renumber labels in order of their first occurrence, so that they don't depend on hash values"""
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first, kind='stable')] = np.arange(len(first))
+    return rank[inverse.ravel()]
+
+
+def color_refinement(classes, links, link_labels=None, max_rounds=None):
+    """Refine a partition of the switches until it is equitable (vectorized 1-dimensional Weisfeiler-Leman).
+
+    Every round a switch is split off its class if the multiset of (class of neighbour, label of link) differs, the
+    multisets are compared through two independent 64 bit hash sums.
+    :param classes: Initial class label of every switch (switch i at position i - first ID)
+    :param links: (L, 2) array of directed links with positions (not IDs) of the switches
+    :param link_labels (optional, defaults to all equal): Integer label of every directed link, e.g. its capacity class
+    :param max_rounds (optional, defaults to the number of switches): Upper bound of refinement rounds
+    :return: An array of class labels, numbered in order of their first switch
+    """
+
+    labels = relabel(np.asarray(classes, dtype=np.int64))
+    if link_labels is None:
+        link_labels = np.zeros(len(links), dtype=np.int64)
+    link_labels = np.asarray(link_labels, dtype=np.uint64)
+    count = labels.max(initial=-1) + 1
+    for _ in range(len(labels) if max_rounds is None else max_rounds):
+        seen = labels[links[:, 1]].astype(np.uint64) * np.uint64(link_labels.max(initial=0) + 1) + link_labels
+        signatures = []
+        for salt in (1, 2):
+            total = np.zeros(len(labels), dtype=np.uint64)
+            np.add.at(total, links[:, 0], mix_hash(seen, salt))
+            signatures.append(total.view(np.int64))
+        labels = relabel(labels, *signatures)
+        new_count = labels.max(initial=-1) + 1
+        if new_count == count:
+            break
+        count = new_count
+    return by_first_member(labels)
+
+
+class SymmetryQuotient:
+    """Switch and link orbits of a topology, with helpers to run analyses once per orbit"""
+
+    def __init__(self, topology):
+        """
+
+        :param topology: The topology object. Link capacities take part in the refinement, links of different capacity
+            are never in the same orbit.
+        """
+
+        self.topology = topology
+        self.first_id = topology.indices[0][0]
+        self.edges = topology.gen_edges()
+        links = topology.gen_links()
+        capacities = topology.gen_capacities(links)
+        if capacities is None:
+            link_labels = np.zeros(len(links), dtype=np.int64)
+        else:
+            link_labels = np.unique(np.nan_to_num(capacities, nan=-1.0), return_inverse=True)[1].ravel()
+        self.orbit_of = color_refinement(topology.switch_classes(), links - self.first_id, link_labels)
+        self.orbit_count = int(self.orbit_of.max(initial=-1)) + 1
+        self.orbit_sizes = np.bincount(self.orbit_of, minlength=self.orbit_count)
+        # Lowest switch ID of every orbit
+        members = np.argsort(self.orbit_of, kind='stable')
+        self.representatives = members[np.cumsum(self.orbit_sizes) - self.orbit_sizes] + self.first_id
+
+        # Link orbits: orbits of both ends and capacities of both directions
+        e = len(self.edges)
+        ends = np.sort(self.orbit_of[self.edges - self.first_id], axis=1)
+        forward, backward = link_labels[:e], link_labels[e:]
+        self.link_orbit_of = by_first_member(relabel(ends[:, 0], ends[:, 1], np.minimum(forward, backward), np.maximum(forward, backward)))
+        self.link_orbit_count = int(self.link_orbit_of.max(initial=-1)) + 1
+        self.link_orbit_sizes = np.bincount(self.link_orbit_of, minlength=self.link_orbit_count)
+        _, self.representative_links = np.unique(self.link_orbit_of, return_index=True)
+
+    def orbit(self, ids):
+        """Orbit of switches
+
+        :param ids: A switch ID or an array of switch IDs
+        :return: The orbit number (or an array of orbit numbers)
+        """
+        return self.orbit_of[np.asarray(ids) - self.first_id]
+
+    def members(self, orbit):
+        """All switch IDs of an orbit"""
+        return np.flatnonzero(self.orbit_of == orbit) + self.first_id
+
+    def broadcast(self, values):
+        """Expand per-orbit results to all switches.
+
+        :param values: An array with one entry (or row) per orbit, in the order of self.representatives
+        :return: An array with one entry (or row) per switch, ordered by switch ID
+        """
+        return np.asarray(values)[self.orbit_of]
+
+    def broadcast_links(self, values):
+        """Expand per-link-orbit results to all links.
+
+        :param values: An array with one entry (or row) per link orbit, in the order of self.representative_links
+        :return: An array with one entry (or row) per row of Topology.gen_edges()
+        """
+        return np.asarray(values)[self.link_orbit_of]
+
+    def map_switches(self, function):
+        """Evaluate a per-switch function on the representatives only.
+
+        :param function: Function taking a switch ID and returning a number or an array of fixed shape
+        :return: The results for all switches, ordered by switch ID
+        """
+        return self.broadcast(np.array([function(int(switch)) for switch in self.representatives]))
+
+    def map_links(self, function):
+        """Evaluate a per-link function on the representatives only.
+
+        :param function: Function taking the two switch IDs of a link and returning a number or an array of fixed shape
+        :return: The results for all links, in the order of Topology.gen_edges()
+        """
+        return self.broadcast_links(np.array([function(int(u), int(v)) for (u, v) in self.edges[self.representative_links]]))
+
+    def verify(self, samples=4, seed=0):
+        """Spot check that the orbits are real symmetry classes: random members of every orbit must see the same
+        number of switches per orbit at every distance as their representative.
+
+        :param samples (optional, defaults to 4): How many random members per orbit are checked
+        :param seed (optional, defaults to 0): Seed of the sampling
+        :return: True if all checks pass
+        """
+
+        rng = np.random.default_rng(seed)
+        adjacency = switch_adjacency(self.topology)
+        for orbit, representative in enumerate(self.representatives):
+            members = self.members(orbit)
+            checked = np.concatenate(([representative], rng.choice(members, size=min(samples, len(members)), replace=False)))
+            distances = shortest_path(adjacency, unweighted=True, indices=checked - self.first_id)
+            distances = np.where(np.isinf(distances), -1, distances).astype(np.int64)
+            # Count the switches per (distance, orbit) cell, unreachable ones in distance -1
+            cells = (distances + 1) * self.orbit_count + self.orbit_of
+            width = int(cells.max()) + 1
+            table = np.stack([np.bincount(row, minlength=width) for row in cells])
+            if not (table == table[0]).all():
+                return False
+        return True
+
+
+# Quotients are built once per topology, keyed by fingerprint
+_symmetry_cache = FingerprintCache()
+
+
+def symmetry(topology):
+    """The symmetry quotient of a topology, built on first use and shared by structurally identical topologies.
+
+    :param topology: The topology object
+    :return: A SymmetryQuotient
+    """
+
+    return _symmetry_cache.get(topology, lambda: SymmetryQuotient(topology))
+
+
+def representative_distances(topology):
+    """Hop distances from the orbit representatives to all switches, the only shortest path computation needed for the
+    per-switch distance statistics.
+
+    :param topology: The topology object
+    :return: A (K, N) int64 array (-1 if unreachable), row i belongs to the i-th representative, column j to switch ID j + 1
+    """
+
+    quotient = symmetry(topology)
+    distances = shortest_path(switch_adjacency(topology), unweighted=True, indices=quotient.representatives - quotient.first_id)
+    return np.where(np.isinf(distances), -1, distances).astype(np.int64)
+
+
+def distance_profiles(topology):
+    """How many switches are at each hop distance from every switch.
+
+    :param topology: The topology object
+    :return: An (N, D + 1) int64 array, entry [i, d] counts the switches at distance d from switch ID i + 1
+    """
+
+    distances = representative_distances(topology)
+    width = int(distances.max(initial=0)) + 1
+    rows = np.repeat(np.arange(len(distances)), distances.shape[1])
+    reachable = distances.ravel() >= 0
+    profiles = np.zeros((len(distances), width), dtype=np.int64)
+    np.add.at(profiles, (rows[reachable], distances.ravel()[reachable]), 1)
+    return symmetry(topology).broadcast(profiles)
+
+
+def eccentricities(topology):
+    """Largest hop distance from every switch to any reachable switch.
+
+    :param topology: The topology object
+    :return: An (N,) int64 array ordered by switch ID
+    """
+    return symmetry(topology).broadcast(representative_distances(topology).max(axis=1))
+
+
+def average_distances(topology):
+    """Average hop distance from every switch to all other reachable switches.
+
+    :param topology: The topology object
+    :return: An (N,) float array ordered by switch ID
+    """
+
+    distances = representative_distances(topology)
+    reachable = distances > 0
+    return symmetry(topology).broadcast(np.where(reachable, distances, 0).sum(axis=1) / np.maximum(reachable.sum(axis=1), 1))
+
+
+def tor_path_diversity(topology):
+    """Number of shortest paths from every switch to the ToRs (ECMP path diversity), counted level by level from the
+    representatives only. Only summaries are returned: a representative sees the same counts as the other switches of
+    its orbit, but towards different ToRs.
+
+    :param topology: The topology object
+    :return: Two (N,) float arrays ordered by switch ID: the fewest shortest paths to any other reachable ToR and the
+        average over all other reachable ToRs
+    """
+
+    quotient = symmetry(topology)
+    distances = representative_distances(topology)
+    adjacency = switch_adjacency(topology)
+    adjacency = sp.csr_matrix((np.ones(adjacency.nnz), adjacency.indices, adjacency.indptr), shape=adjacency.shape)
+    counts = np.zeros(distances.shape)
+    counts[np.arange(len(distances)), quotient.representatives - quotient.first_id] = 1.0
+    # Paths to a switch at distance d = sum of the paths to its neighbours at distance d - 1 (all representatives at once)
+    for d in range(1, int(distances.max(initial=0)) + 1):
+        previous = np.where(distances == d - 1, counts, 0.0)
+        counts = np.where(distances == d, (adjacency @ previous.T).T, counts)
+    tors = np.asarray(topology.indices[0]) - quotient.first_id
+    other = distances[:, tors] > 0
+    counts = counts[:, tors]
+    fewest = np.where(other, counts, np.inf).min(axis=1)
+    average = np.where(other, counts, 0.0).sum(axis=1) / np.maximum(other.sum(axis=1), 1)
+    return quotient.broadcast(np.where(np.isinf(fewest), 0.0, fewest)), quotient.broadcast(average)
+
+
+def link_failure_impact(topology):
+    """Impact of failing each link on the ToR to ToR distances, computed once per link orbit.
+
+    Costs one shortest path computation from all ToRs per link orbit.
+    :param topology: The topology object
+    :return: Two arrays in the order of Topology.gen_edges(): how many ordered ToR pairs get disconnected and by how much
+        the total hop distance of the ToR pairs which stay connected grows
+    """
+
+    quotient = symmetry(topology)
+    links = topology.gen_links()
+    e = len(quotient.edges)
+    tors = np.asarray(topology.indices[0]) - quotient.first_id
+
+    def tor_distances(keep):
+        adjacency = switch_adjacency(topology, links[keep])
+        return shortest_path(adjacency, unweighted=True, indices=tors)[:, tors]
+
+    baseline = tor_distances(np.ones(len(links), dtype=bool))
+    disconnected = np.zeros(quotient.link_orbit_count, dtype=np.int64)
+    stretch = np.zeros(quotient.link_orbit_count)
+    for orbit, link in enumerate(quotient.representative_links):
+        keep = np.ones(len(links), dtype=bool)
+        keep[[link, link + e]] = False
+        distances = tor_distances(keep)
+        lost = np.isinf(distances) & np.isfinite(baseline)
+        disconnected[orbit] = lost.sum()
+        stretch[orbit] = (distances - baseline)[np.isfinite(distances) & np.isfinite(baseline)].sum()
+    return quotient.broadcast_links(disconnected), quotient.broadcast_links(stretch)
@@ -1,10 +1,65 @@
 import abc
+import hashlib
 import inspect
+import numpy as np
 from networkx.drawing.nx_pydot import to_pydot
+from .wiring import compile_edges
+from .hosts import HostLayer
+
+# Graphs shared between structurally identical topologies, keyed by fingerprint (see Topology.gen_graph_cached)
+GRAPH_CACHE_SIZE = 16
+# Size of the other caches of results shared between structurally identical topologies (routing matrices, edge
+# indexes, symmetry quotients, spectral metrics)
+CACHE_SIZE = 16
+
+
+class FingerprintCache:
+    """Bounded cache of results computed once per topology and shared by topologies with the same fingerprint.
+    When it is full, the oldest result is evicted."""
+
+    def __init__(self, size=CACHE_SIZE):
+        """
+
+        :param size (optional, defaults to CACHE_SIZE): How many results are kept
+        """
+
+        self.size = size
+        self.entries = {}
+
+    def get(self, topology, compute, name=None):
+        """The cached result for a topology, computed on a miss.
+
+        :param topology: The topology object
+        :param compute: Function without arguments computing the result
+        :param name (optional, defaults to None): Tells apart several results cached per topology
+        :return: The result
+        """
+
+        key = (topology.fingerprint(), name)
+        if key not in self.entries:
+            result = compute()
+            if len(self.entries) >= self.size:
+                # Evict the oldest result
+                del self.entries[next(iter(self.entries))]
+            self.entries[key] = result
+        return self.entries[key]
+
+    def clear(self):
+        """Drop all cached results"""
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+_graph_cache = FingerprintCache(GRAPH_CACHE_SIZE)
 
 class Topology:
     """Base Topology Object"""
 
+    # True if gen_graph() is built from gen_edges(), graph_edges() then doesn't need to generate the graph
+    graph_from_edges = False
+
     def __init__(self, indices, descriptor, capacity_function):
         """
 
@@ -21,6 +76,10 @@ class Topology:
             if nr_of_params < 2 or nr_of_params > 3:
                 raise ValueError("Signature of capacity function is unsupported! Expected form: cap(source_id, dest_id, topology_object=None). (2 or 3 arguments!)")
         self.capacity_function = capacity_function
+        # Optional host layer below the ToRs, see attach_hosts()
+        self.hosts = None
+        # Computed on first use, see fingerprint()
+        self.fingerprint_value = None
 
     @abc.abstractmethod
     def gen_graph(self):
@@ -36,6 +95,166 @@ class Topology:
         :return: A 2-dimentional array representing the node positions which is as wide as the widest layer. (horizontal pos, layer)
         """
 
+    def clos_spec(self):
+        """Describe the topology declaratively as switch layers and wiring rules (see wiring.py).
+
+        :return: A tuple (layers, rules) or None if the topology can't be described this way
+        """
+        return None
+
+    def switch_classes(self):
+        """Candidate symmetry classes of the switches derived from the index structure, see symmetry.py.
+        Switches in different classes are never treated as equivalent, switches in the same class only if the wiring agrees.
+        The layered topologies wire every switch of a layer by the same rules, so the layer is the class. Topologies without
+        such a description (e.g. random graphs) put every switch in a class of its own.
+
+        :return: An int array with one class label per switch, ordered by switch ID
+        """
+
+        ids = np.arange(self.indices[0][0], self.indices[-1][-1] + 1)
+        if self.clos_spec() is None:
+            return ids
+        return self.layer_of(ids)
+
+    def gen_edges(self):
+        """Generate the links of the topology as an array. Uses the vectorized wiring engine if the topology
+        provides a clos_spec(), otherwise the links are extracted from gen_graph().
+
+        :return: An (E, 2) int64 numpy array of switch ID pairs (smaller ID first), one row per bidirectional link, sorted
+        """
+
+        spec = self.clos_spec()
+        if spec is not None:
+            return compile_edges(*spec)
+        return self.graph_edges()
+
+    def graph_edges(self):
+        """The links of gen_graph(), the generator of record. For topologies with a clos_spec() these are generated
+        independently of gen_edges(), assert_equivalent() therefore looks at both.
+
+        :return: An (E, 2) int64 numpy array of switch ID pairs (smaller ID first), one row per bidirectional link, sorted
+        """
+
+        if self.graph_from_edges:
+            return self.gen_edges()
+        edges = np.array(list(self.gen_graph().edges), dtype=np.int64).reshape(-1, 2)
+        return np.unique(np.sort(edges, axis=1), axis=0)
+
+    def gen_links(self):
+        """Generate the directed links of the topology. Link i and link i + E are the two directions of row i of gen_edges().
+
+        :return: A (2E, 2) int64 numpy array of (source, destination) switch IDs
+        """
+
+        edges = self.gen_edges()
+        return np.concatenate((edges, edges[:, ::-1]))
+
+    def iter_edges(self, chunk_size=65536, directed=False):
+        """Iterate over the links of the topology in chunks, e.g. for streaming them to a file.
+
+        :param chunk_size (optional, defaults to 65536): Maximum number of links per chunk
+        :param directed (optional, defaults to False): If True, iterate over both directions of every link (in the order of gen_links())
+        :return: A generator of (chunk_size, 2) int64 arrays of switch ID pairs
+        """
+
+        edges = self.gen_edges()
+        for reverse in ((False, True) if directed else (False,)):
+            for start in range(0, len(edges), chunk_size):
+                chunk = edges[start:start + chunk_size]
+                yield chunk[:, ::-1] if reverse else chunk
+
+    def layer_of(self, ids):
+        """Layer of switches, 0 being the ToR layer.
+
+        :param ids: A switch ID or an array of switch IDs
+        :return: The layer number (or an array of layer numbers)
+        """
+
+        first_ids = np.array([layer[0] for layer in self.indices])
+        return np.searchsorted(first_ids, ids, side='right') - 1
+
+    def node_coordinates(self):
+        """Drawing coordinates of all switches, taken from set_node_positions().
+
+        :return: Two float arrays (x, layer) with one entry per switch, ordered by switch ID
+        """
+
+        position = self.set_node_positions()
+        first_ids = np.array([layer[0] for layer in self.indices])
+        ids = np.arange(self.indices[0][0], self.indices[-1][-1] + 1)
+        layers = self.layer_of(ids)
+        return position[layers, ids - first_ids[layers]], layers.astype(float)
+
+    def gen_capacities(self, links=None):
+        """Evaluate the capacity function on an array of directed links.
+
+        :param links (optional, defaults to gen_links()): A (L, 2) array of (source, destination) switch IDs
+        :return: A float array with the capacity of every link (NaN where the function returns None), or None if no capacity function was passed
+        """
+
+        if self.capacity_function is None:
+            return None
+        if links is None:
+            links = self.gen_links()
+        # Inspect the signature once, not for every link
+        if len(inspect.signature(self.capacity_function).parameters) == 2:
+            values = [self.capacity_function(u, v) for (u, v) in links.tolist()]
+        else:
+            values = [self.capacity_function(u, v, self) for (u, v) in links.tolist()]
+        return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+    def fingerprint(self):
+        """Structural fingerprint of the topology: a hash of the layer sizes, the sorted and layer labelled links of
+        gen_edges() and their capacities. Computed once per object, the topology must not be changed afterwards.
+
+        Two topology objects with the same fingerprint generate the same graph, no matter how they were parametrised.
+        gen_graph() is not generated; whether it agrees with gen_edges() is checked by assert_equivalent().
+        The descriptor is not part of the fingerprint.
+        :return: A hex string
+        """
+
+        if self.fingerprint_value is not None:
+            return self.fingerprint_value
+        edges = self.gen_edges()
+        digest = hashlib.sha256()
+        digest.update(np.array([len(layer) for layer in self.indices], dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(edges, dtype=np.int64).tobytes())
+        digest.update(self.layer_of(edges).astype(np.int8).tobytes())
+        capacities = self.gen_capacities(np.concatenate((edges, edges[:, ::-1])))
+        if capacities is not None:
+            digest.update(capacities.tobytes())
+        self.fingerprint_value = digest.hexdigest()
+        return self.fingerprint_value
+
+    def assert_equivalent(self, other):
+        """Assert that another topology object generates the same graph (e.g. after refactoring a generator).
+        Both generators are compared: the links of gen_graph() and the ones of gen_edges().
+
+        Raises an AssertionError describing the first difference found.
+        :param other: The topology object to compare with
+        """
+
+        def assert_same_links(name, edges, other_edges):
+            assert edges.shape == other_edges.shape, "%s: %d vs %d links" % (name, len(edges), len(other_edges))
+            mismatch = np.flatnonzero(np.any(edges != other_edges, axis=1))
+            assert len(mismatch) == 0, "%s: %d links differ, first: %s vs %s" % (name, len(mismatch), edges[mismatch[0]], other_edges[mismatch[0]])
+
+        sizes = [len(layer) for layer in self.indices]
+        other_sizes = [len(layer) for layer in other.indices]
+        assert sizes == other_sizes, "Layer sizes differ: %s vs %s" % (sizes, other_sizes)
+        assert_same_links("gen_graph()", self.graph_edges(), other.graph_edges())
+        assert_same_links("gen_edges()", self.gen_edges(), other.gen_edges())
+        assert self.fingerprint() == other.fingerprint(), "Link capacities differ"
+
+    def gen_graph_cached(self):
+        """Like gen_graph() but structurally identical topologies share one graph object.
+        The graph must therefore not be modified, copy it first if needed.
+
+        :return: A graph of the Topology (networkx)
+        """
+
+        return _graph_cache.get(self, self.gen_graph)
+
     def init_capacities(self, G):
         """ Initializes the capacities on the graph according to the passed capacity function on init.
         If no capacity function was passed, simply returns the graph G.
@@ -53,6 +272,42 @@ class Topology:
                     G.edges[u, v]['capacity'] = self.capacity_function(u, v, self)
         return G
 
+    def capacity(self, u, v):
+        """Capacity of a single link according to the capacity function passed on init.
+
+        :param u: ID of the source of the link
+        :param v: ID of the destination of the link
+        :return: The capacity of the link or None if no capacity function was passed
+        """
+
+        if self.capacity_function is None:
+            return None
+        if len(inspect.signature(self.capacity_function).parameters) == 2:
+            return self.capacity_function(u, v)
+        return self.capacity_function(u, v, self)
+
+    def default_hosts_per_tor(self):
+        """How many hosts hang below each ToR if not specified otherwise.
+
+        :return: The number of hosts per ToR or None if the topology doesn't define it
+        """
+        return None
+
+    def attach_hosts(self, hosts_per_tor=None):
+        """Adds a host layer below the ToRs. The hosts are not added to generated graphs, use self.hosts.materialize(G) for that.
+
+        Raises a ValueError if hosts_per_tor isn't given and the topology has no default.
+        :param hosts_per_tor (optional, defaults to default_hosts_per_tor()): How many hosts are attached to each ToR
+        :return: The HostLayer object, also stored in self.hosts
+        """
+
+        if hosts_per_tor is None:
+            hosts_per_tor = self.default_hosts_per_tor()
+        if hosts_per_tor is None:
+            raise ValueError("%s has no default number of hosts per ToR, please pass hosts_per_tor" % self.descriptor)
+        self.hosts = HostLayer(self, hosts_per_tor)
+        return self.hosts
+
     def generate_drawing(self, G=None):
         """Sets some basic parameters for drawing and creates a G_dot object (Graphviz .dot format) for later drawing.
 
@@ -72,7 +327,7 @@ class Topology:
         G_dot = to_pydot(G)
 
         # Set graph attributes
-        G_dot.set_name(self)
+        G_dot.set_name(self.descriptor)
         G_dot.set_ordering('in')  # order incoming edge at a node
         G_dot.set_rankdir('BT')  # core switches appear on top
         G_dot.set_layout('neato')
@@ -0,0 +1,247 @@
+import json
+import os
+import numpy as np
+
+#####                   #####
+####                     ####
+###    Capacity traces    ###
+####                     ####
+#####                   #####
+
+# A capacity trace holds the capacity of every link at every time step (maintenance windows, degradation, diurnal
+# changes, ...), so that analyses can run over time without regenerating graphs. Logically it is a (timesteps x links)
+# array, the links in the order of Topology.gen_links() (or gen_edges() for traces with the same capacity in both
+# directions). On disk it is a directory:
+#   meta.json           time step length, number of time steps, chunk size, layer sizes, ...
+#   edges.npy           the topology's gen_edges(), so the trace can be checked against a topology and sliced by layer
+#   chunk_00000.npy     time steps 0 ... chunk_size - 1 stored columnar, i.e. as a (links, chunk_size) array in which
+#   chunk_00001.npy     the series of one link is contiguous, and so on
+# The chunks are memory-mapped, a window of time steps only touches the chunks it overlaps and a subset of links only
+# the rows of those links. Windows come out as (links, steps) arrays, the layout RoutingMatrix.utilization() takes.
+
+META_FILE = "meta.json"
+EDGES_FILE = "edges.npy"
+CHUNK_FILE = "chunk_%05d.npy"
+
+
+def static_capacities(topology, directed=True):
+    """Capacities of the capacity function of a topology (1 where there is none), a starting point for building traces.
+
+    :param topology: The topology object
+    :param directed (optional, defaults to True): Per directed link (order of gen_links()) or per link (order of gen_edges())
+    :return: A float array of 2E or E capacities
+    """
+
+    links = topology.gen_links() if directed else topology.gen_edges()
+    capacities = topology.gen_capacities(links)
+    return np.ones(len(links)) if capacities is None else capacities
+
+
+class CapacityTraceWriter:
+    """Writes a capacity trace time step by time step, chunk by chunk"""
+
+    def __init__(self, path, topology, interval=60.0, chunk_size=256, directed=True, dtype=np.float32):
+        """
+
+        :param path: Directory of the trace, created if needed
+        :param topology: The topology object the trace belongs to
+        :param interval (optional, defaults to 60.0): Length of a time step in seconds
+        :param chunk_size (optional, defaults to 256): Time steps per chunk file
+        :param directed (optional, defaults to True): One capacity per directed link (gen_links()) or one for both
+            directions of a link (gen_edges())
+        :param dtype (optional, defaults to float32): Data type of the stored capacities
+        """
+
+        if chunk_size < 1:
+            raise ValueError("The chunk size must be positive, got %d" % chunk_size)
+        self.path = str(path)
+        os.makedirs(self.path, exist_ok=True)
+        edges = topology.gen_edges()
+        np.save(os.path.join(self.path, EDGES_FILE), edges)
+        self.link_count = 2 * len(edges) if directed else len(edges)
+        self.meta = {
+            "descriptor": topology.descriptor,
+            "layer_sizes": [len(layer) for layer in topology.indices],
+            "first_id": int(topology.indices[0][0]),
+            "directed": directed,
+            "interval": float(interval),
+            "chunk_size": int(chunk_size),
+            "dtype": np.dtype(dtype).str,
+            "timesteps": 0,
+        }
+        self.buffer = np.empty((self.link_count, chunk_size), dtype=dtype)
+        self.buffered = 0
+        self.chunks = 0
+
+    def append(self, capacities):
+        """Add time steps to the trace.
+
+        Raises a ValueError if the number of links doesn't match.
+        :param capacities: An (L,) array for one time step or a (steps, L) array for several
+        """
+
+        capacities = np.asarray(capacities)
+        if capacities.ndim == 1:
+            capacities = capacities[np.newaxis, :]
+        if capacities.shape[1] != self.link_count:
+            raise ValueError("Expected %d capacities per time step, got %d" % (self.link_count, capacities.shape[1]))
+        chunk_size = self.meta["chunk_size"]
+        while len(capacities):
+            take = min(chunk_size - self.buffered, len(capacities))
+            self.buffer[:, self.buffered:self.buffered + take] = capacities[:take].T
+            self.buffered += take
+            capacities = capacities[take:]
+            if self.buffered == chunk_size:
+                self.flush()
+
+    def flush(self):
+        """Write the buffered time steps as a chunk (a shorter one if the buffer isn't full, only at the end of a trace)"""
+        if self.buffered == 0:
+            return
+        np.save(os.path.join(self.path, CHUNK_FILE % self.chunks), self.buffer[:, :self.buffered])
+        self.meta["timesteps"] += self.buffered
+        self.chunks += 1
+        self.buffered = 0
+
+    def close(self):
+        """Write the last chunk and the metadata, the trace can be opened afterwards"""
+        self.flush()
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_capacity_trace(path, topology, capacities, interval=60.0, chunk_size=256, directed=True, dtype=np.float32):
+    """Write a whole (timesteps x links) capacity array as a trace, see CapacityTraceWriter for the parameters.
+
+    :return: The opened CapacityTrace
+    """
+
+    with CapacityTraceWriter(path, topology, interval, chunk_size, directed, dtype) as writer:
+        writer.append(capacities)
+    return CapacityTrace(path)
+
+
+class CapacityTrace:
+    """Memory-mapped capacity trace, see write_capacity_trace()"""
+
+    def __init__(self, path, topology=None):
+        """
+
+        Raises a ValueError if a topology is given and the trace was written for different links.
+        :param path: Directory of the trace
+        :param topology (optional, defaults to None): The topology the trace will be used with, to check the links
+        """
+
+        self.path = str(path)
+        with open(os.path.join(self.path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.edges = np.load(os.path.join(self.path, EDGES_FILE), mmap_mode='r')
+        self.edge_count = len(self.edges)
+        self.directed = self.meta["directed"]
+        self.interval = self.meta["interval"]
+        self.timesteps = self.meta["timesteps"]
+        self.chunk_size = self.meta["chunk_size"]
+        # Number of links in the order of gen_links(), also for traces stored per link
+        self.link_count = 2 * self.edge_count
+        self.stored_links = self.link_count if self.directed else self.edge_count
+        chunk_count = -(-self.timesteps // self.chunk_size)
+        self.chunks = [np.load(os.path.join(self.path, CHUNK_FILE % i), mmap_mode='r') for i in range(chunk_count)]
+        if topology is not None:
+            self.check(topology)
+
+    def check(self, topology):
+        """Raises a ValueError if the trace doesn't belong to the links of a topology"""
+        edges = topology.gen_edges()
+        if edges.shape != self.edges.shape or np.any(edges != self.edges):
+            raise ValueError("The capacity trace of %s doesn't match the links of %s" % (self.meta["descriptor"], topology.descriptor))
+
+    def stored_rows(self, links):
+        """Rows of the chunks holding directed links (the reverse direction shares the row in traces stored per link)"""
+        if links is None:
+            return None
+        links = np.asarray(links, dtype=np.int64)
+        return links if self.directed else links % self.edge_count
+
+    def window(self, start=0, stop=None, links=None):
+        """Capacities of a window of time steps.
+
+        Raises a ValueError if the window is outside of the trace.
+        :param start (optional, defaults to 0): First time step
+        :param stop (optional, defaults to the end of the trace): Time step after the window
+        :param links (optional, defaults to all): Array of directed link indices (order of gen_links())
+        :return: A (links, stop - start) float array, as taken by RoutingMatrix.utilization()
+        """
+
+        if stop is None:
+            stop = self.timesteps
+        if not 0 <= start <= stop <= self.timesteps:
+            raise ValueError("Time steps %d ... %d are outside of the trace (%d time steps)" % (start, stop, self.timesteps))
+        rows = self.stored_rows(links)
+        parts = [np.zeros((self.stored_links if rows is None else len(rows), 0))]
+        for i in range(start // self.chunk_size, -(-stop // self.chunk_size)):
+            first = i * self.chunk_size
+            chunk = self.chunks[i][:, max(start - first, 0):min(stop - first, self.chunk_size)]
+            parts.append(chunk if rows is None else chunk[rows])
+        capacities = np.concatenate(parts, axis=1)
+        if rows is None and not self.directed:
+            return np.concatenate((capacities, capacities))
+        return capacities
+
+    def at(self, timestep, links=None):
+        """Capacities at a single time step.
+
+        :param timestep: The time step
+        :param links (optional, defaults to all): Array of directed link indices (order of gen_links())
+        :return: An (L,) float array
+        """
+        return self.window(timestep, timestep + 1, links)[:, 0]
+
+    def iter_windows(self, window_size=None, links=None):
+        """Walk over the trace window by window.
+
+        :param window_size (optional, defaults to the chunk size): Time steps per window
+        :param links (optional, defaults to all): Array of directed link indices (order of gen_links())
+        :return: A generator of (start, capacities) with capacities as returned by window()
+        """
+
+        if window_size is None:
+            window_size = self.chunk_size
+        for start in range(0, self.timesteps, window_size):
+            yield start, self.window(start, min(start + window_size, self.timesteps), links)
+
+    def layer_pair_links(self, source_layer, destination_layer):
+        """Directed links between two layers (0 being the ToR layer), e.g. (0, 1) for the ToR uplinks.
+
+        :param source_layer: Layer of the source switches
+        :param destination_layer: Layer of the destination switches
+        :return: An int64 array of directed link indices (order of gen_links())
+        """
+
+        first_ids = self.meta["first_id"] + np.cumsum([0] + self.meta["layer_sizes"][:-1])
+        layers = np.searchsorted(first_ids, self.edges, side='right') - 1
+        forward = np.flatnonzero((layers[:, 0] == source_layer) & (layers[:, 1] == destination_layer))
+        backward = np.flatnonzero((layers[:, 1] == source_layer) & (layers[:, 0] == destination_layer)) + self.edge_count
+        return np.sort(np.concatenate((forward, backward)))
+
+    def layer_pair(self, source_layer, destination_layer, start=0, stop=None):
+        """Capacities of the directed links between two layers over a window of time steps.
+
+        :param source_layer: Layer of the source switches
+        :param destination_layer: Layer of the destination switches
+        :param start (optional, defaults to 0): First time step
+        :param stop (optional, defaults to the end of the trace): Time step after the window
+        :return: A tuple (links, capacities): the directed link indices and a (links, stop - start) float array
+        """
+
+        links = self.layer_pair_links(source_layer, destination_layer)
+        return links, self.window(start, stop, links)
+
+    def times(self, start=0, stop=None):
+        """Start times of time steps in seconds since the start of the trace"""
+        return np.arange(start, self.timesteps if stop is None else stop) * self.interval
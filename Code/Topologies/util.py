@@ -24,6 +24,21 @@ def gen_nodes(*switches):
 
     return G
 
+def gen_graph_from_edges(edges, *switches):
+    """Creates a networkx DiGraph with the nodes of gen_nodes() and both directions of every link.
+
+    :param edges: An (E, 2) array of switch ID pairs
+    :param switches: A list of switch counts (int) per layer
+    :return: A networkx DiGraph
+    """
+
+    G = gen_nodes(*switches)
+    edges = np.asarray(edges).tolist()
+    G.add_edges_from(edges)
+    G.add_edges_from((v, u) for (u, v) in edges)
+
+    return G
+
 def preprocess_node_positions(topo):
     """Constructs the 2D array which will later hold the node positions of each node and pre-fills the TOR_Layer (0) with evenly spaced nodes.
 
@@ -61,3 +76,95 @@ def preprocess_node_positions(topo):
     return node_width, node_gap, position
 
 
+
+
+#####                 #####
+####                   ####
+###    Random graphs    ###
+####                   ####
+#####                 #####
+
+def contains(sorted_keys, keys):
+    """Vectorized membership test of keys in a sorted array"""
+    at = np.minimum(np.searchsorted(sorted_keys, keys), max(len(sorted_keys) - 1, 0))
+    return sorted_keys[at] == keys if len(sorted_keys) else np.zeros(len(keys), dtype=bool)
+
+
+def random_pairing(stubs, rng, edges=None, max_rounds=1000):
+    """Randomly pairs up port stubs into links without self loops or parallel links (vectorized configuration model).
+
+    All stubs are shuffled and paired at once. Invalid pairs (self loops, duplicates) are then repaired by swapping
+    endpoints with random valid pairs (degree preserving), until no invalid pair is left.
+    Raises a ValueError if no valid pairing is found within max_rounds rounds.
+    :param stubs: Array of switch IDs, one entry per free port (an odd stub out is dropped)
+    :param rng: A numpy random Generator
+    :param edges (optional): (E, 2) array of existing links which must not be duplicated
+    :param max_rounds (optional, defaults to 1000): How many repair rounds to try
+    :return: An (S / 2, 2) int64 array of new links (smaller ID first), sorted
+    """
+
+    stubs = rng.permutation(np.asarray(stubs, dtype=np.int64))
+    stubs = stubs[:len(stubs) - len(stubs) % 2]
+    pairs = np.sort(stubs.reshape(-1, 2), axis=1)
+    existing = np.zeros((0, 2), dtype=np.int64) if edges is None else np.sort(np.asarray(edges, dtype=np.int64), axis=1)
+    scale = max(int(stubs.max(initial=0)), int(existing.max(initial=0))) + 1
+    existing_keys = np.sort(existing[:, 0] * scale + existing[:, 1])
+    for _ in range(max_rounds):
+        keys = pairs[:, 0] * scale + pairs[:, 1]
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        # Keep the first occurrence of every link, unless it already exists
+        invalid = (pairs[:, 0] == pairs[:, 1]) | contains(existing_keys, keys)
+        invalid[order[1:][sorted_keys[1:] == sorted_keys[:-1]]] = True
+        bad = np.flatnonzero(invalid)
+        if len(bad) == 0:
+            return pairs[order]
+        # Swap an endpoint of every invalid pair with a random valid pair (a, b), (c, d) -> (a, c), (b, d) and keep the
+        # swaps leading to two new valid links, a plain re-shuffle keeps colliding on high degree switches
+        good = np.flatnonzero(~invalid)
+        partners = rng.choice(good, size=min(len(bad), len(good)), replace=False)
+        bad = bad[:len(partners)]
+        flip = rng.random(len(partners)) < 0.5
+        c = np.where(flip, pairs[partners, 1], pairs[partners, 0])
+        d = np.where(flip, pairs[partners, 0], pairs[partners, 1])
+        first_pairs = np.sort(np.stack((pairs[bad, 0], c), axis=1), axis=1)
+        second_pairs = np.sort(np.stack((pairs[bad, 1], d), axis=1), axis=1)
+        new_keys = np.concatenate((first_pairs[:, 0] * scale + first_pairs[:, 1], second_pairs[:, 0] * scale + second_pairs[:, 1]))
+        # New links must be simple, not taken yet and not proposed twice
+        new_sorted = np.sort(new_keys)
+        repeated = new_sorted[1:][new_sorted[1:] == new_sorted[:-1]]
+        fine = ~(contains(sorted_keys, new_keys) | contains(existing_keys, new_keys) | contains(repeated, new_keys))
+        accept = fine[:len(bad)] & fine[len(bad):] & (first_pairs[:, 0] != first_pairs[:, 1]) & (second_pairs[:, 0] != second_pairs[:, 1])
+        pairs[bad[accept]] = first_pairs[accept]
+        pairs[partners[accept]] = second_pairs[accept]
+    raise ValueError("Could not pair the ports into a simple graph, are there too many ports per switch?")
+
+
+def remove_links(edges, count, rng):
+    """Randomly removes links while taking as few ports as possible from every switch (vectorized).
+
+    Every round removes a random matching among the links whose ends lost the fewest ports so far: a link is taken if it
+    has the lowest random rank among these links at both of its ends.
+    :param edges: (E, 2) array of links
+    :param count: How many links to remove, at most E
+    :param rng: A numpy random Generator
+    :return: The remaining links in their original order
+    """
+
+    edges = np.asarray(edges, dtype=np.int64)
+    rank = rng.permutation(len(edges))
+    removed = np.zeros(len(edges), dtype=bool)
+    lost = np.zeros(int(edges.max(initial=0)) + 1, dtype=np.int64)
+    limit = 1
+    while removed.sum() < count:
+        free = np.flatnonzero(~removed & (lost[edges[:, 0]] < limit) & (lost[edges[:, 1]] < limit))
+        if len(free) == 0:
+            limit += 1
+            continue
+        lowest = np.full(len(lost), len(edges))
+        np.minimum.at(lowest, edges[free].ravel(), np.repeat(rank[free], 2))
+        taken = free[(lowest[edges[free, 0]] == rank[free]) & (lowest[edges[free, 1]] == rank[free])]
+        taken = taken[np.argsort(rank[taken])][:count - removed.sum()]
+        removed[taken] = True
+        np.add.at(lost, edges[taken].ravel(), 1)
+    return edges[~removed]
@@ -0,0 +1,381 @@
+import json
+import os
+import numpy as np
+
+#####               #####
+####                 ####
+###    HTML viewer    ###
+####                 ####
+#####               #####
+
+# A static, offline alternative to draw_topology() for topologies with thousands of switches: write_viewer() turns the
+# positions of set_node_positions() into a pyramid of tiles plus an index.html that draws the visible tiles on a canvas.
+# The layers always fill the height of the window, zooming and panning happen along x only, so the pyramid splits x:
+# level z has 2^z tiles of equal width.
+#   - Low levels are aggregated: every tile splits each layer into `bins` bins, a bin is drawn as one node sized by
+#     its number of switches and the links between two bins as one bundle.
+#   - The first level at which no tile holds more than `detail` switches of a layer holds the single switches and links.
+#     Zooming in further keeps using it.
+# A link (or bundle) is stored with the tiles of both ends, so it is drawn as soon as one end is visible.
+# The tiles are small scripts calling DCViewer.tile(level, index, data), which the page adds as <script> elements when
+# they come into view. Unlike fetch() this also works for pages opened from disk, no server is needed.
+
+LAYER_PREFIXES = ["t", "p", "s", "ss"]
+LAYER_COLORS = ["gray", "blue", "black", "red"]
+
+
+def group(keys):
+    """Sort based unique: the distinct keys, the group of every key and the group sizes
+
+    :param keys: An int64 array
+    :return: A tuple (unique keys, inverse, counts)
+    """
+
+    order = np.argsort(keys, kind='stable')
+    ordered = keys[order]
+    new = np.concatenate(([True], ordered[1:] != ordered[:-1]))
+    starts = np.flatnonzero(new)
+    inverse = np.empty(len(keys), dtype=np.int64)
+    inverse[order] = np.cumsum(new) - 1
+    return ordered[starts], inverse, np.diff(np.append(starts, len(keys)))
+
+
+class TilePyramid:
+    """Tiles of a topology drawing, see write_viewer()"""
+
+    def __init__(self, topology, detail=128, bins=64, max_level=16):
+        """
+
+        :param topology: The topology object to draw
+        :param detail (optional, defaults to 128): Most switches of a layer in a tile of the detailed level
+        :param bins (optional, defaults to 64): Bins per layer and tile in the aggregated levels
+        :param max_level (optional, defaults to 16): Deepest level, detailed even if the tiles are fuller
+        """
+
+        self.topology = topology
+        self.bins = bins
+        self.x, layers = topology.node_coordinates()
+        self.layers = layers.astype(np.int64)
+        self.layer_count = len(topology.indices)
+        self.first_id = topology.indices[0][0]
+        self.edges = topology.gen_edges()
+        self.capacities = topology.gen_capacities(self.edges)
+        self.x_min = float(self.x.min())
+        self.width = max(float(self.x.max()) - self.x_min, 1.0)
+        self.detail_level = max_level
+        for level in range(max_level + 1):
+            if np.bincount(self.tile_of(self.x, level) * self.layer_count + self.layers).max() <= detail:
+                self.detail_level = level
+                break
+
+    def tile_of(self, x, level):
+        """Index of the tile holding x coordinates at a level"""
+        tiles = 2 ** level
+        return np.clip(((x - self.x_min) / self.width * tiles).astype(np.int64), 0, tiles - 1)
+
+    def link_tiles(self, a_x, b_x, level, columns):
+        """Split links (or bundles) over the tiles of their ends.
+
+        :param a_x: Array of x coordinates of the first ends
+        :param b_x: Array of x coordinates of the second ends
+        :param level: The level
+        :param columns: Dict of per link arrays to store
+        :return: A dict tile -> {"links": columns of the links whose first end is in the tile,
+            "extra": columns of the links with only the second end in the tile}
+        """
+
+        tiles = {}
+        a_tile = self.tile_of(a_x, level)
+        b_tile = self.tile_of(b_x, level)
+        for kind, tile, selected in (("links", a_tile, np.arange(len(a_x))), ("extra", b_tile, np.flatnonzero(a_tile != b_tile))):
+            order = selected[np.argsort(tile[selected], kind='stable')]
+            bounds = np.searchsorted(tile[order], np.arange(2 ** level + 1))
+            for i in np.flatnonzero(np.diff(bounds)).tolist():
+                rows = order[bounds[i]:bounds[i + 1]]
+                tiles.setdefault(i, {"links": None, "extra": None})[kind] = {name: values[rows].tolist() for name, values in columns.items()}
+        return tiles
+
+    def node_tiles(self, x, level, columns):
+        """Split nodes over tiles, returns a dict tile -> columns of its nodes"""
+        tile = self.tile_of(x, level)
+        order = np.argsort(tile, kind='stable')
+        bounds = np.searchsorted(tile[order], np.arange(2 ** level + 1))
+        return {i: {name: values[order[bounds[i]:bounds[i + 1]]].tolist() for name, values in columns.items()}
+                for i in np.flatnonzero(np.diff(bounds)).tolist()}
+
+    def aggregated_level(self, level):
+        """Tiles of an aggregated level: bins of switches and bundles of links between bins.
+
+        :param level: The level
+        :return: A dict tile index -> tile data
+        """
+
+        total_bins = 2 ** level * self.bins
+        position = np.clip(((self.x - self.x_min) / self.width * total_bins).astype(np.int64), 0, total_bins - 1)
+        keys, inverse, counts = group(self.layers * total_bins + position)
+        bin_x = np.round(np.bincount(inverse, weights=self.x) / counts, 2)
+        bin_layer = keys // total_bins
+        nodes = self.node_tiles(bin_x, level, {"x": bin_x, "l": bin_layer, "n": counts})
+        ends = inverse[self.edges - self.first_id]
+        pairs, _, bundle_counts = group(np.minimum(ends[:, 0], ends[:, 1]) * len(keys) + np.maximum(ends[:, 0], ends[:, 1]))
+        a, b = pairs // len(keys), pairs % len(keys)
+        links = self.link_tiles(bin_x[a], bin_x[b], level, {"ax": bin_x[a], "al": bin_layer[a], "bx": bin_x[b],
+                                                            "bl": bin_layer[b], "n": bundle_counts})
+        return {i: dict(nodes.get(i, {}), **links.get(i, {})) for i in set(nodes) | set(links)}
+
+    def detailed_level(self):
+        """Tiles of the detailed level: single switches and links.
+
+        :return: A dict tile index -> tile data
+        """
+
+        level = self.detail_level
+        x = np.round(self.x, 2)
+        ids = np.arange(self.first_id, self.first_id + len(x))
+        nodes = self.node_tiles(x, level, {"id": ids, "x": x, "l": self.layers})
+        a, b = self.edges[:, 0] - self.first_id, self.edges[:, 1] - self.first_id
+        columns = {"ax": x[a], "al": self.layers[a], "bx": x[b], "bl": self.layers[b]}
+        if self.capacities is not None:
+            columns["c"] = np.where(np.isnan(self.capacities), None, self.capacities)
+        links = self.link_tiles(x[a], x[b], level, columns)
+        return {i: dict(nodes.get(i, {}), **links.get(i, {})) for i in set(nodes) | set(links)}
+
+    def levels(self):
+        """All levels from the coarsest to the detailed one.
+
+        :return: A generator of (level, dict tile index -> tile data)
+        """
+
+        for level in range(self.detail_level):
+            yield level, self.aggregated_level(level)
+        yield self.detail_level, self.detailed_level()
+
+    def meta(self):
+        """Description of the pyramid for the page"""
+        return {
+            "descriptor": self.topology.descriptor,
+            "switches": len(self.x),
+            "links": len(self.edges),
+            "layers": self.layer_count,
+            "prefixes": (LAYER_PREFIXES + ["l%d-" % i for i in range(len(LAYER_PREFIXES), self.layer_count)])[:self.layer_count],
+            "colors": (LAYER_COLORS * self.layer_count)[:self.layer_count],
+            "x_min": self.x_min,
+            "width": self.width,
+            "detail_level": self.detail_level,
+            "bins": self.bins,
+        }
+
+
+def write_viewer(topology, directory=None, detail=128, bins=64, max_level=16):
+    """Write an offline HTML viewer of a topology: index.html plus a tiles folder, open index.html in a browser.
+
+    :param topology: The topology object to draw
+    :param directory (optional, defaults to <descriptor>_viewer): Where to write the viewer, created if needed
+    :param detail (optional, defaults to 128): Most switches of a layer in a tile of the detailed level
+    :param bins (optional, defaults to 64): Bins per layer and tile in the aggregated levels
+    :param max_level (optional, defaults to 16): Deepest level, detailed even if the tiles are fuller
+    :return: The path of index.html
+    """
+
+    if directory is None:
+        directory = topology.descriptor + "_viewer"
+    pyramid = TilePyramid(topology, detail, bins, max_level)
+    for level, tiles in pyramid.levels():
+        folder = os.path.join(directory, "tiles", str(level))
+        os.makedirs(folder, exist_ok=True)
+        for i, data in tiles.items():
+            with open(os.path.join(folder, "%d.js" % i), "w") as f:
+                f.write("DCViewer.tile(%d,%d,%s);\n" % (level, i, json.dumps(data, separators=(",", ":"))))
+    path = os.path.join(directory, "index.html")
+    with open(path, "w") as f:
+        f.write(PAGE.replace("__TITLE__", topology.descriptor).replace("__META__", json.dumps(pyramid.meta())))
+    return path
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+  html, body { margin: 0; height: 100%; overflow: hidden; font: 13px sans-serif; }
+  canvas { display: block; width: 100%; height: 100%; cursor: grab; }
+  #info { position: absolute; left: 8px; top: 8px; padding: 4px 8px; background: rgba(255, 255, 255, 0.85); }
+</style>
+</head>
+<body>
+<canvas id="view"></canvas>
+<div id="info"></div>
+<script>
+var META = __META__;
+var DCViewer = (function () {
+  var canvas = document.getElementById("view");
+  var context = canvas.getContext("2d");
+  var info = document.getElementById("info");
+  // "level/index" -> tile data, null while loading, false if there is no such tile (nothing in it)
+  var tiles = {};
+  // World x at the left edge of the window and pixels per world unit
+  var view = {x0: META.x_min, scale: 1};
+  var margin = 40;
+  var nodes = [];
+  var queued = false;
+  var drag = null;
+
+  function fitScale() { return (canvas.width - 2 * margin) / META.width; }
+
+  function fit() {
+    view.scale = fitScale();
+    view.x0 = META.x_min - margin / view.scale;
+  }
+
+  function resize() {
+    canvas.width = window.innerWidth;
+    canvas.height = window.innerHeight;
+  }
+
+  function layerY(layer) {
+    if (META.layers == 1) return canvas.height / 2;
+    return canvas.height - margin - layer * (canvas.height - 2 * margin) / (META.layers - 1);
+  }
+
+  function screenX(x) { return (x - view.x0) * view.scale; }
+
+  function currentLevel() {
+    var level = Math.round(Math.log2(view.scale / fitScale()));
+    return Math.max(0, Math.min(META.detail_level, level));
+  }
+
+  function tileOf(x, level) {
+    var count = Math.pow(2, level);
+    return Math.max(0, Math.min(count - 1, Math.floor((x - META.x_min) / META.width * count)));
+  }
+
+  function request(level, index) {
+    var key = level + "/" + index;
+    if (key in tiles) return;
+    tiles[key] = null;
+    var script = document.createElement("script");
+    script.src = "tiles/" + key + ".js";
+    script.onerror = function () { tiles[key] = false; redraw(); };
+    document.head.appendChild(script);
+  }
+
+  // The tile itself if loaded, else its closest loaded ancestor (coarser, but drawn until the tile arrives)
+  function covering(level, index) {
+    for (; level >= 0; level--, index >>= 1) {
+      var data = tiles[level + "/" + index];
+      if (data) return {level: level, index: index, data: data};
+      if (data === false) return null;
+    }
+    return null;
+  }
+
+  // Draws the links (rows) of a tile, skip(k) tells which ones are drawn by another tile
+  function drawLinks(links, detailed, skip) {
+    if (!links) return;
+    var labels = detailed && links.c && view.scale > 25;
+    for (var k = 0; k < links.ax.length; k++) {
+      if (skip(k)) continue;
+      var ax = screenX(links.ax[k]), ay = layerY(links.al[k]), bx = screenX(links.bx[k]), by = layerY(links.bl[k]);
+      context.globalAlpha = detailed ? 0.5 : Math.min(1, 0.15 + 0.1 * Math.log2(links.n[k] + 1));
+      context.lineWidth = detailed ? 1 : 1 + Math.log2(links.n[k]) / 2;
+      context.beginPath();
+      context.moveTo(ax, ay);
+      context.lineTo(bx, by);
+      context.stroke();
+      if (labels && links.c[k] !== null) context.fillText(links.c[k], (ax + bx) / 2, (ay + by) / 2);
+    }
+  }
+
+  function draw() {
+    queued = false;
+    context.clearRect(0, 0, canvas.width, canvas.height);
+    var level = currentLevel();
+    var first = tileOf(view.x0, level), last = tileOf(view.x0 + canvas.width / view.scale, level);
+    var shown = {}, list = [];
+    for (var i = Math.max(0, first - 1); i <= last + 1 && i < Math.pow(2, level); i++) {
+      request(level, i);
+      var tile = covering(level, i);
+      if (tile && i >= first && i <= last && !((tile.level + "/" + tile.index) in shown)) {
+        shown[tile.level + "/" + tile.index] = true;
+        list.push(tile);
+      }
+    }
+    context.strokeStyle = "gray";
+    context.fillStyle = "black";
+    list.forEach(function (tile) {
+      var detailed = tile.level == META.detail_level;
+      drawLinks(tile.data.links, detailed, function () { return false; });
+      // Links with the first end in a shown tile are drawn there
+      var extra = tile.data.extra;
+      drawLinks(extra, detailed, function (k) { return (tile.level + "/" + tileOf(extra.ax[k], tile.level)) in shown; });
+    });
+    context.globalAlpha = 1;
+    nodes = [];
+    var labels = view.scale > 25;
+    list.forEach(function (tile) {
+      var data = tile.data;
+      if (!data.x) return;
+      var detailed = tile.level == META.detail_level;
+      var binWidth = META.width / Math.pow(2, tile.level) / META.bins * view.scale;
+      for (var k = 0; k < data.x.length; k++) {
+        var x = screenX(data.x[k]), y = layerY(data.l[k]);
+        var radius = detailed ? Math.max(2, Math.min(8, view.scale / 3)) : Math.max(2, Math.min(binWidth / 2, 2 + Math.sqrt(data.n[k])));
+        context.fillStyle = META.colors[data.l[k]];
+        context.beginPath();
+        context.arc(x, y, radius, 0, 2 * Math.PI);
+        context.fill();
+        var text = detailed ? META.prefixes[data.l[k]] + "-" + data.id[k] : data.n[k] + (data.n[k] == 1 ? " switch" : " switches") + " in layer " + data.l[k];
+        if (detailed && labels) context.fillText(text, x + radius + 2, y - radius - 2);
+        nodes.push([x, y, radius, text]);
+      }
+    });
+    info.textContent = META.descriptor + ": " + META.switches + " switches, " + META.links + " links, level " + level + "/" + META.detail_level
+      + " - drag to pan, scroll to zoom, double click to reset";
+  }
+
+  function redraw() {
+    if (!queued) {
+      queued = true;
+      window.requestAnimationFrame(draw);
+    }
+  }
+
+  canvas.addEventListener("mousedown", function (event) { drag = event.clientX; canvas.style.cursor = "grabbing"; });
+  window.addEventListener("mouseup", function () { drag = null; canvas.style.cursor = "grab"; });
+  window.addEventListener("mousemove", function (event) {
+    if (drag !== null) {
+      view.x0 -= (event.clientX - drag) / view.scale;
+      drag = event.clientX;
+      redraw();
+      return;
+    }
+    for (var k = 0; k < nodes.length; k++) {
+      var node = nodes[k];
+      if (Math.abs(node[0] - event.clientX) <= node[2] + 2 && Math.abs(node[1] - event.clientY) <= node[2] + 2) {
+        canvas.title = node[3];
+        return;
+      }
+    }
+    canvas.title = "";
+  });
+  canvas.addEventListener("wheel", function (event) {
+    event.preventDefault();
+    var x = view.x0 + event.clientX / view.scale;
+    var scale = view.scale * Math.exp(-event.deltaY * 0.002);
+    view.scale = Math.max(fitScale() / 2, Math.min(fitScale() * Math.pow(2, META.detail_level + 6), scale));
+    view.x0 = x - event.clientX / view.scale;
+    redraw();
+  }, {passive: false});
+  canvas.addEventListener("dblclick", function () { fit(); redraw(); });
+  window.addEventListener("resize", function () { resize(); redraw(); });
+
+  resize();
+  fit();
+  redraw();
+  return {tile: function (level, index, data) { tiles[level + "/" + index] = data; redraw(); }};
+})();
+</script>
+</body>
+</html>
+"""
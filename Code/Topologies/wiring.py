@@ -0,0 +1,217 @@
+import abc
+import numpy as np
+
+#####                 #####
+####                   ####
+###    Wiring engine    ###
+####                   ####
+#####                 #####
+
+# Layered topologies are described declaratively by a list of switch layers and a list of wiring rules.
+# Every rule works on the local (0-based) switch indices of the layers it connects and returns all of its links
+# at once as numpy arrays, the engine then shifts them to the global switch IDs (starting at 1, bottom layer first).
+
+
+class Layer:
+    """One layer of switches in a layered topology"""
+
+    def __init__(self, name, switch_count, group_size=None):
+        """
+
+        Raises a ValueError if the switches can't be split into groups of group_size.
+        :param name: Name of the layer. Wiring rules refer to layers by name and the topology exposes the switch IDs as <name>_idx_range
+        :param switch_count: How many switches are in this layer
+        :param group_size (optional, defaults to None): How many consecutive switches form a group (pod, block, ...). None means the whole layer is one group.
+        """
+
+        if switch_count < 1:
+            raise ValueError("Layer %s needs at least one switch" % name)
+        if group_size is not None and (group_size < 1 or switch_count % group_size != 0):
+            raise ValueError("Layer %s: %d switches can't be split into groups of %d" % (name, switch_count, group_size))
+        self.name = name
+        self.switch_count = switch_count
+        self.group_size = switch_count if group_size is None else group_size
+
+    def groups(self, idx):
+        """Group of each local switch index"""
+        return idx // self.group_size
+
+    def __repr__(self):
+        return "Layer(%r, %d, group_size=%d)" % (self.name, self.switch_count, self.group_size)
+
+
+def match_keys(lower_keys, upper_keys):
+    """Connects every lower switch to every upper switch holding the same key (vectorized join).
+
+    :param lower_keys: Key per local index of the lower layer
+    :param upper_keys: Key per local index of the upper layer
+    :return: Two arrays (lower local indices, upper local indices) of equal length, one entry per link
+    """
+
+    order = np.argsort(upper_keys, kind='stable')
+    sorted_keys = upper_keys[order]
+    start = np.searchsorted(sorted_keys, lower_keys, side='left')
+    counts = np.searchsorted(sorted_keys, lower_keys, side='right') - start
+    src = np.repeat(np.arange(len(lower_keys), dtype=np.int64), counts)
+    # Position of every link inside the run of matching upper switches
+    offsets = np.arange(counts.sum(), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    dst = order[np.repeat(start, counts) + offsets]
+    return src, dst
+
+
+class WiringRule:
+    """Base wiring rule connecting two layers"""
+
+    def __init__(self, lower, upper):
+        """
+
+        :param lower: Name of the lower layer (source of the links)
+        :param upper: Name of the upper layer (destination of the links)
+        """
+        self.lower = lower
+        self.upper = upper
+
+    @abc.abstractmethod
+    def local_edges(self, lower, upper):
+        """Generate the links of this rule.
+
+        :param lower: The lower Layer object
+        :param upper: The upper Layer object
+        :return: Two arrays (lower local indices, upper local indices) of equal length, one entry per link
+        """
+
+
+class FullBipartite(WiringRule):
+    """Connects every switch of a group in the lower layer to every switch of the group with the same number in the upper layer"""
+
+    def local_edges(self, lower, upper):
+        return match_keys(lower.groups(np.arange(lower.switch_count)), upper.groups(np.arange(upper.switch_count)))
+
+
+class Striped(WiringRule):
+    """Connects switches of two layers which sit in the same plane.
+
+    The plane of a switch is ((local index // stride) + shift) % planes, so planes can either be interleaved (stride 1)
+    or formed by consecutive switches (stride = switches per plane).
+    """
+
+    def __init__(self, lower, upper, planes, lower_stride=1, upper_stride=1, shift=0, grouped=False):
+        """
+
+        :param lower: Name of the lower layer
+        :param upper: Name of the upper layer
+        :param planes: How many planes there are
+        :param lower_stride (optional, defaults to 1): How many consecutive lower switches share a plane
+        :param upper_stride (optional, defaults to 1): How many consecutive upper switches share a plane
+        :param shift (optional, defaults to 0): Rotates the planes of the lower switches by this amount
+        :param grouped (optional, defaults to False): If True, only switches of the groups with the same number are connected
+        """
+        super().__init__(lower, upper)
+        self.planes = planes
+        self.lower_stride = lower_stride
+        self.upper_stride = upper_stride
+        self.shift = shift
+        self.grouped = grouped
+
+    def local_edges(self, lower, upper):
+        lower_idx = np.arange(lower.switch_count)
+        upper_idx = np.arange(upper.switch_count)
+        lower_keys = (lower_idx // self.lower_stride + self.shift) % self.planes
+        upper_keys = (upper_idx // self.upper_stride) % self.planes
+        if self.grouped:
+            lower_keys = lower_keys + lower.groups(lower_idx) * self.planes
+            upper_keys = upper_keys + upper.groups(upper_idx) * self.planes
+        return match_keys(lower_keys, upper_keys)
+
+
+class RoundRobin(WiringRule):
+    """Distributes a fixed number of uplinks per lower switch evenly over the blocks of the upper layer.
+
+    Links are numbered globally (n = lower index * links_per_switch + link) and link n ends in block n % blocks,
+    moving on to the next switch position inside the blocks every time all blocks have been used once.
+    Duplicate links between the same pair of switches collapse into one.
+    """
+
+    def __init__(self, lower, upper, links_per_switch, block_size=1):
+        """
+
+        :param lower: Name of the lower layer
+        :param upper: Name of the upper layer
+        :param links_per_switch: How many uplinks each lower switch has
+        :param block_size (optional, defaults to 1): How many consecutive upper switches form a block
+        """
+        super().__init__(lower, upper)
+        self.links_per_switch = links_per_switch
+        self.block_size = block_size
+
+    def local_edges(self, lower, upper):
+        if upper.switch_count % self.block_size != 0:
+            raise ValueError("Layer %s can't be split into blocks of %d" % (upper.name, self.block_size))
+        blocks = upper.switch_count // self.block_size
+        n = np.arange(lower.switch_count * self.links_per_switch, dtype=np.int64)
+        src = n // self.links_per_switch
+        dst = (n % blocks) * self.block_size + (n // blocks) % self.block_size
+        return src, dst
+
+
+class Mesh(WiringRule):
+    """Connects all switches inside a group of one layer with each other"""
+
+    def __init__(self, layer, group_size=None):
+        """
+
+        :param layer: Name of the layer
+        :param group_size (optional, defaults to None): Size of the fully meshed groups. None uses the group size of the layer.
+        """
+        super().__init__(layer, layer)
+        self.group_size = group_size
+
+    def local_edges(self, lower, upper):
+        group_size = lower.group_size if self.group_size is None else self.group_size
+        idx = np.arange(lower.switch_count)
+        src, dst = match_keys(idx // group_size, idx // group_size)
+        keep = src < dst
+        return src[keep], dst[keep]
+
+
+def layer_ranges(layers):
+    """Switch ID ranges of the layers, bottom layer first and starting at ID 1.
+
+    :param layers: A list of Layer objects
+    :return: A list of ranges, one per layer
+    """
+
+    ranges = []
+    first = 1
+    for layer in layers:
+        ranges.append(range(first, first + layer.switch_count))
+        first += layer.switch_count
+    return ranges
+
+
+def compile_edges(layers, rules):
+    """Generates all links described by the wiring rules.
+
+    Raises a ValueError if a rule refers to an unknown layer.
+    :param layers: A list of Layer objects, bottom layer first
+    :param rules: A list of WiringRule objects
+    :return: An (E, 2) int64 array of switch ID pairs (smaller ID first), one row per bidirectional link, sorted and without duplicates
+    """
+
+    by_name = {}
+    for layer, idx_range in zip(layers, layer_ranges(layers)):
+        by_name[layer.name] = (layer, idx_range[0])
+
+    chunks = [np.zeros((0, 2), dtype=np.int64)]
+    for rule in rules:
+        for name in (rule.lower, rule.upper):
+            if name not in by_name:
+                raise ValueError("Wiring rule %s refers to unknown layer %s" % (type(rule).__name__, name))
+        lower, lower_first = by_name[rule.lower]
+        upper, upper_first = by_name[rule.upper]
+        src, dst = rule.local_edges(lower, upper)
+        src = np.asarray(src, dtype=np.int64) + lower_first
+        dst = np.asarray(dst, dtype=np.int64) + upper_first
+        chunks.append(np.column_stack((np.minimum(src, dst), np.maximum(src, dst))))
+
+    return np.unique(np.concatenate(chunks), axis=0)
@@ -0,0 +1,133 @@
+from .topology import Topology
+from .util import gen_graph_from_edges, preprocess_node_positions, random_pairing, remove_links
+import numpy as np
+
+class Xpander(Topology):
+    """ Xpander, a random lift of a complete graph
+
+    Structure extracted from: https://dl.acm.org/doi/10.1145/2999572.2999580
+
+    The complete graph on network_ports + 1 meta nodes is lifted: every meta node becomes lift switches and every
+    meta link becomes a random perfect matching between the switches of its two meta nodes.
+    """
+
+    # gen_graph() is built from gen_edges()
+    graph_from_edges = True
+
+    def __init__(self, network_ports, lift, seed=0, switch_count=None, link_count=None, capacity_function=None):
+        """
+
+        Raises a ValueError if switch_count or link_count is out of range.
+        :param network_ports: How many ports of each switch connect to other switches (d, the degree)
+        :param lift: How many switches per meta node
+        :param seed (optional, defaults to 0): Seed of the random matchings, the same seed always gives the same topology
+        :param switch_count (optional, defaults to (network_ports + 1) * lift): Remove switches (one per meta node) to get
+            exactly this many, the ports they leave behind are wired randomly among each other
+        :param link_count (optional, defaults to all links): Remove random links to keep exactly this many, every switch
+            loses as few ports as possible (see util.remove_links())
+        :param capacity_function (optional, defaults to None): Function used to initialise link capacities based on their endpoints.
+        """
+
+        full_count = (network_ports + 1) * lift
+        if switch_count is None:
+            switch_count = full_count
+        if switch_count > full_count or switch_count <= full_count - (network_ports + 1):
+            raise ValueError("With these parameters, switch_count must be between %d and %d" % (full_count - network_ports, full_count))
+        if link_count is not None and not 0 <= link_count <= switch_count * network_ports // 2:
+            raise ValueError("With these parameters, link_count must be between 0 and %d" % (switch_count * network_ports // 2))
+        self.network_ports = network_ports
+        self.lift = lift
+        self.seed = seed
+        self.switch_count = switch_count
+        self.link_count = link_count
+        self.edges = None
+        self.tor_idx_range = range(1, switch_count + 1)
+        indices = [self.tor_idx_range]
+        descriptor = "Xpander_" + str(network_ports) + "_" + str(lift) + "_" + str(seed)
+        if switch_count != full_count:
+            descriptor += "_" + str(switch_count)
+        if link_count is not None:
+            descriptor += "_L" + str(link_count)
+        super().__init__(indices, descriptor, capacity_function)
+
+    @classmethod
+    def matched_to(cls, topology, seed=0, capacity_function=None):
+        """Xpander with the same switch count and link count as another topology. The lift has the average nr. of network
+        ports per switch rounded up, the surplus links are removed (see link_count).
+
+        :param topology: The topology object to match
+        :param seed (optional, defaults to 0): Seed of the random matchings
+        :param capacity_function (optional, defaults to None): Function used to initialise link capacities based on their endpoints.
+        :return: An Xpander object
+        """
+
+        switch_count = topology.indices[-1][-1] + 1 - topology.indices[0][0]
+        link_count = len(topology.gen_edges())
+        network_ports = min(max(1, -(-2 * link_count // switch_count)), switch_count - 1)
+        lift = -(-switch_count // (network_ports + 1))
+        xpander = cls(network_ports, lift, seed, switch_count, min(link_count, switch_count * network_ports // 2), capacity_function)
+        xpander.descriptor = "Xpander_" + topology.descriptor + "_" + str(seed)
+        return xpander
+
+    def gen_edges(self):
+        """Generate the random lift, computed once per object.
+
+        :return: An (E, 2) int64 numpy array of switch ID pairs (smaller ID first), one row per bidirectional link, sorted
+        """
+
+        if self.edges is not None:
+            return self.edges
+        rng = np.random.default_rng(self.seed)
+        meta_nodes = self.network_ports + 1
+        # One random perfect matching per pair of meta nodes, switch IDs are meta node * lift + copy + 1
+        first, second = np.triu_indices(meta_nodes, k=1)
+        matchings = np.argsort(rng.random((len(first), self.lift)), axis=1)
+        copies = np.broadcast_to(np.arange(self.lift), matchings.shape)
+        u = (first[:, np.newaxis] * self.lift + copies).ravel() + 1
+        v = (second[:, np.newaxis] * self.lift + matchings).ravel() + 1
+        edges = np.column_stack((u, v))
+
+        removed_count = meta_nodes * self.lift - self.switch_count
+        if removed_count > 0:
+            # Remove the last copy of the first meta nodes and rewire the ports left behind
+            removed = np.arange(removed_count) * self.lift + self.lift
+            gone = np.isin(edges, removed)
+            touched = gone.any(axis=1)
+            # Links with exactly one removed end leave a free port on the other end
+            broken = touched & ~gone.all(axis=1)
+            stubs = edges[broken][~gone[broken]]
+            edges = edges[~touched]
+            edges = np.concatenate((edges, random_pairing(stubs, rng, edges)))
+            # Close the gaps in the switch IDs
+            kept = np.setdiff1d(np.arange(1, meta_nodes * self.lift + 1), removed)
+            edges = np.searchsorted(kept, edges) + 1
+
+        if self.link_count is not None and len(edges) > self.link_count:
+            edges = remove_links(edges, len(edges) - self.link_count, rng)
+
+        # The lift and the pairing never produce parallel links, only the order is left
+        edges = np.sort(edges, axis=1)
+        self.edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+        return self.edges
+
+    def gen_graph(self):
+        """Constructs a Networkx Graph of the Xpander
+
+        :return: A networkx DiGraph of the Xpander
+        """
+
+        G = gen_graph_from_edges(self.gen_edges(), self.switch_count)
+
+        # Initialize Capacities
+        G = self.init_capacities(G)
+
+        return G
+
+    def set_node_positions(self):
+        """Compute the x-axis coordinate of nodes for later drawing. All switches sit evenly spaced in one layer.
+
+        :return: A 2-dimentional array representing the node positions. (horizontal pos, layer)
+        """
+
+        _, _, position = preprocess_node_positions(self)
+        return position
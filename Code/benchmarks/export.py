@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the streaming exporters against the networkx writers.
+
+Run from the "Code" folder: python -m benchmarks.export Jupiter
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import networkx as nx
+
+from Topologies.fatTree import FatTree
+from Topologies.jupiter import Jupiter
+from Topologies.jupiter_blocks import Jupiter_bl
+from Topologies import export
+
+TOPOLOGIES = {
+    "FatTree": lambda: FatTree(32),
+    "Jupiter_bl": lambda: Jupiter_bl(),
+    "Jupiter": lambda: Jupiter(),
+}
+
+
+def measure(func):
+    """Run func once and return (seconds, peak traced memory in MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("topology", choices=sorted(TOPOLOGIES), help="Which (default sized) topology to export")
+    args = parser.parse_args()
+    topology = TOPOLOGIES[args.topology]()
+    # Same capacity on every link, so the writers have something to write
+    topology.capacity_function = lambda u, v: 40.0
+
+    with tempfile.TemporaryDirectory() as folder:
+        def path(name):
+            return os.path.join(folder, name)
+        runs = [
+            ("networkx write_graphml (incl. gen_graph)", lambda: nx.write_graphml(topology.gen_graph(), path("nx.graphml"))),
+            ("networkx write_edgelist (incl. gen_graph)", lambda: nx.write_edgelist(topology.gen_graph(), path("nx.edges"))),
+            ("write_graphml", lambda: export.write_graphml(topology, path("t.graphml"))),
+            ("write_graphml gzip", lambda: export.write_graphml(topology, path("t.graphml.gz"))),
+            ("write_edge_list", lambda: export.write_edge_list(topology, path("t.csv"))),
+            ("write_ns3", lambda: export.write_ns3(topology, path("t.inet"))),
+            ("write_mininet", lambda: export.write_mininet(topology, path("t.py"))),
+            ("write_ned", lambda: export.write_ned(topology, path("t.ned"))),
+        ]
+        print("%s: %d switches, %d links" % (topology.descriptor, topology.indices[-1][-1], len(topology.gen_edges())))
+        for name, func in runs:
+            seconds, peak = measure(func)
+            print("%-45s %8.2f s %10.1f MB peak" % (name, seconds, peak))
+
+
+if __name__ == "__main__":
+    main()
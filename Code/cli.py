@@ -10,6 +10,9 @@ from Topologies.fatTree import FatTree
 from Topologies.fabric import Fabric
 from Topologies.jupiter import Jupiter
 from Topologies.jupiter_blocks import Jupiter_bl
+from Topologies.jellyfish import Jellyfish
+from Topologies.xpander import Xpander
+from Topologies.server import parse_descriptor
 
 """
 Command line support
@@ -56,6 +59,37 @@ def gen_draw_jupiter(args):
         topology = Jupiter(spine_block_count=arg_dict["s_b"], aggregation_block_count=arg_dict["a_b"])
     topology.draw_topology()
 
+def gen_matched_reference(descriptor):
+    """Build the topology to match from its descriptor, e.g. FatTree_8 or Fabric_3_2_4_48"""
+    topology_class, arguments = parse_descriptor(descriptor)
+    return topology_class(*arguments)
+
+def gen_draw_jellyfish(args):
+    arg_dict = vars(args)
+    if arg_dict["match"] is not None:
+        seed = 0 if arg_dict["seed"] is None else arg_dict["seed"]
+        topology = Jellyfish.matched_to(gen_matched_reference(arg_dict["match"]), seed=seed)
+    elif arg_dict["s_c"] is None or arg_dict["n_p"] is None:
+        raise ValueError("Jellyfish needs s_c and n_p, or --match")
+    elif arg_dict["seed"] is None:
+        topology = Jellyfish(arg_dict["s_c"], arg_dict["n_p"])
+    else:
+        topology = Jellyfish(arg_dict["s_c"], arg_dict["n_p"], seed=arg_dict["seed"])
+    topology.draw_topology()
+
+def gen_draw_xpander(args):
+    arg_dict = vars(args)
+    if arg_dict["match"] is not None:
+        seed = 0 if arg_dict["seed"] is None else arg_dict["seed"]
+        topology = Xpander.matched_to(gen_matched_reference(arg_dict["match"]), seed=seed)
+    elif arg_dict["n_p"] is None or arg_dict["lift"] is None:
+        raise ValueError("Xpander needs n_p and lift, or --match")
+    elif arg_dict["seed"] is None:
+        topology = Xpander(arg_dict["n_p"], arg_dict["lift"])
+    else:
+        topology = Xpander(arg_dict["n_p"], arg_dict["lift"], seed=arg_dict["seed"])
+    topology.draw_topology()
+
 # Handle parsing of command line parameters
 parser = argparse.ArgumentParser()
 # add parser for fat-tree topology
@@ -80,6 +114,20 @@ jupiter_parser = subparsers.add_parser("Jupiter")
 jupiter_parser.add_argument("--s_b", type=int, help="spine_blocks: (defaults to 256), How many spine blocks to instantiate ,s_b >= a_b")
 jupiter_parser.add_argument("--a_b", type=int, help="aggregation_blocks: (defaults to 64), How many aggregation blocks to instantiate ,a_b < s_b")
 jupiter_parser.set_defaults(func=gen_draw_jupiter)
+# add parser for Jellyfish topology (random graph)
+jellyfish_parser = subparsers.add_parser("Jellyfish")
+jellyfish_parser.add_argument("s_c", type=int, nargs="?", help="switch_count: How many switches to instantiate")
+jellyfish_parser.add_argument("n_p", type=int, nargs="?", help="network_ports: How many ports of each switch connect to other switches")
+jellyfish_parser.add_argument("--seed", type=int, help="seed: (defaults to 0) Seed of the random wiring")
+jellyfish_parser.add_argument("--match", help="descriptor: Match the switch count and ports of this topology instead of s_c and n_p, e.g. FatTree_8")
+jellyfish_parser.set_defaults(func=gen_draw_jellyfish)
+# add parser for Xpander topology (random lift of a complete graph)
+xpander_parser = subparsers.add_parser("Xpander")
+xpander_parser.add_argument("n_p", type=int, nargs="?", help="network_ports: How many ports of each switch connect to other switches")
+xpander_parser.add_argument("lift", type=int, nargs="?", help="lift: How many switches per meta node, (n_p + 1) * lift switches in total")
+xpander_parser.add_argument("--seed", type=int, help="seed: (defaults to 0) Seed of the random matchings")
+xpander_parser.add_argument("--match", help="descriptor: Match the switch count and average ports of this topology instead of n_p and lift, e.g. FatTree_8")
+xpander_parser.set_defaults(func=gen_draw_xpander)
 
 """
 Main body 
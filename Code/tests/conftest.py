@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules are imported as in the README examples run from the "Code" folder: from Topologies.x import ...
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from Topologies.edge_index import EdgeIndex
+from Topologies.fatTree import FatTree
+from Topologies.jellyfish import Jellyfish
+from Topologies.jupiter import Jupiter
+
+TOPOLOGIES = [FatTree(8), Jupiter(8, 4), Jellyfish(200, 6, seed=1)]
+
+
+@pytest.mark.parametrize("topology", TOPOLOGIES, ids=lambda topology: topology.descriptor)
+def test_round_trip(topology):
+    index = EdgeIndex(topology)
+    edges = topology.gen_edges()
+    links = topology.gen_links()
+    ids = np.arange(len(edges))
+    np.testing.assert_array_equal(index.edge_ids(edges[:, 0], edges[:, 1]), ids)
+    np.testing.assert_array_equal(index.edge_ids(edges[:, 1], edges[:, 0]), ids)
+    np.testing.assert_array_equal(index.edge_endpoints(ids), edges)
+    np.testing.assert_array_equal(index.link_ids(links[:, 0], links[:, 1]), np.arange(len(links)))
+    np.testing.assert_array_equal(index.link_endpoints(np.arange(len(links))), links)
+    for eid in (0, len(edges) // 2, len(edges) - 1):
+        assert index.edge_id(*edges[eid]) == eid
+        assert index.edge_id(*edges[eid][::-1]) == eid
+
+
+@pytest.mark.parametrize("topology", TOPOLOGIES, ids=lambda topology: topology.descriptor)
+def test_non_links(topology):
+    index = EdgeIndex(topology)
+    first, last = topology.indices[0][0], topology.indices[-1][-1]
+    rng = np.random.default_rng(0)
+    u = rng.integers(first - 1, last + 2, 5000)
+    v = rng.integers(first - 1, last + 2, 5000)
+    linked = set(map(tuple, topology.gen_edges().tolist()))
+    missing = np.array([(min(a, b), max(a, b)) not in linked for a, b in zip(u.tolist(), v.tolist())])
+    # Self pairs and IDs outside the topology are included
+    assert missing.sum() > 1000 and (u == v).any() and ((u < first) | (u > last)).any()
+    assert np.all(index.edge_ids(u, v)[missing] == -1)
+    assert np.all(index.link_ids(u, v)[missing] == -1)
+    assert np.all(index.link_ids(u, v)[~missing] >= 0)
+    a, b = u[missing][0], v[missing][0]
+    with pytest.raises(ValueError):
+        index.edge_id(a, b)
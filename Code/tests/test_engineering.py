@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from Topologies.engineering import reconfiguration_delta
+from Topologies.jupiter_blocks import Jupiter_bl
+
+
+def assert_valid_circuits(engineered):
+    """The circuits realise the allocation without exceeding the MB ports"""
+    a = engineered.aggregation_block_count
+    mbs = engineered.middle_block_per_aggregation
+    circuits = engineered.circuits() - engineered.aggregation_idx_range[0]
+    allocation = np.zeros((a, a), dtype=np.int64)
+    np.add.at(allocation, (circuits[:, 0] // mbs, circuits[:, 1] // mbs), 1)
+    assert np.array_equal(allocation + allocation.T, engineered.allocation)
+    assert np.bincount(circuits.ravel()).max() <= engineered.ports_per_middle_block_up
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_small_change_gives_small_delta(seed):
+    topo = Jupiter_bl(256, 64)
+    rng = np.random.default_rng(seed)
+    demand = rng.random((64, 64))
+    current = topo.engineer(demand)
+    demand[3, 5] *= 3
+    demand[5, 3] *= 3
+    engineered = topo.engineer(demand, previous=current)
+    assert_valid_circuits(current)
+    assert_valid_circuits(engineered)
+    _, _, changed = reconfiguration_delta(current.allocation, engineered.allocation)
+    assert 0 < changed
+    assert np.abs(engineered.delta(current)[:, 2]).sum() == changed
@@ -0,0 +1,27 @@
+import ast
+
+from Topologies import export
+from Topologies.fatTree import FatTree
+
+
+def unlimited_uplinks(u, v):
+    """Capacity 10 on the ToR links, None (unlimited) above"""
+    return None if min(u, v) > 8 else 10.0
+
+
+def test_mininet_links_without_capacity(tmp_path):
+    topo = FatTree(4, capacity_function=unlimited_uplinks)
+    text = open(export.write_mininet(topo, str(tmp_path / "topo.py"))).read()
+    links = ast.literal_eval(text[text.index("LINKS = ") + len("LINKS = "):text.index("\n\ntopos")])
+    assert len(links) == len(topo.gen_edges())
+    assert all(capacity == (None if min(u, v) > 8 else 10.0) for (u, v, capacity) in links)
+    compile(text, "topo.py", "exec")
+
+
+def test_ned_links_without_capacity(tmp_path):
+    topo = FatTree(4, capacity_function=unlimited_uplinks)
+    lines = open(export.write_ned(topo, str(tmp_path / "topo.ned"))).read().splitlines()
+    connections = [line for line in lines if "<-->" in line]
+    assert len(connections) == len(topo.gen_edges())
+    assert not any("nan" in line for line in lines)
+    assert sum("datarate = 10.0Gbps;" in line for line in connections) == (topo.gen_edges().min(axis=1) <= 8).sum()
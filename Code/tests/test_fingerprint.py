@@ -0,0 +1,43 @@
+import pytest
+
+from Topologies.clos import Clos
+from Topologies.fabric import Fabric
+from Topologies.fatTree import FatTree
+from Topologies.jupiter import Jupiter
+from Topologies.topology import FingerprintCache
+
+
+class DroppedLink(FatTree):
+    """FatTree whose gen_graph() lost a link, as a refactoring might do"""
+
+    def gen_graph(self):
+        G = super().gen_graph()
+        G.remove_edge(1, 9)
+        G.remove_edge(9, 1)
+        return G
+
+
+def test_assert_equivalent_sees_gen_graph():
+    with pytest.raises(AssertionError, match="gen_graph"):
+        DroppedLink(4).assert_equivalent(FatTree(4))
+    # The clos_spec() alone doesn't know about the lost link
+    with pytest.raises(AssertionError, match="gen_graph"):
+        DroppedLink(4).assert_equivalent(Clos.from_topology(DroppedLink(4)))
+
+
+@pytest.mark.parametrize("topology", [FatTree(8), Fabric(4, 2, 2, 4), Fabric(4, 0, 2, 4), Jupiter(16, 4)],
+                         ids=lambda topology: topology.descriptor)
+def test_equivalent_to_own_spec(topology):
+    topology.assert_equivalent(Clos.from_topology(topology))
+    assert topology.fingerprint() == Clos.from_topology(topology).fingerprint()
+
+
+def test_fingerprint_cache_is_shared_and_bounded():
+    cache = FingerprintCache(size=2)
+    first = cache.get(FatTree(4), object)
+    assert cache.get(FatTree(4), object) is first
+    assert cache.get(FatTree(4), object, "other") is not first
+    cache.get(FatTree(6), object)
+    assert len(cache) == 2
+    # The oldest result was evicted
+    assert cache.get(FatTree(4), object) is not first
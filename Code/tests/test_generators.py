@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from Topologies.fabric import Fabric
+from Topologies.fatTree import FatTree
+from Topologies.jupiter import Jupiter
+from Topologies.jupiter_blocks import Jupiter_bl
+
+# gen_edges() compiles clos_spec() with the wiring engine, every analysis module works on it. It has to stay
+# identical to the links of the hand written gen_graph() generators.
+
+TOPOLOGIES = (
+    [FatTree(k) for k in (2, 4, 6, 8, 12)]
+    + [Fabric(s, e, planes, ports) for s, e, planes, ports in
+       [(1, 0, 4, 48), (4, 0, 2, 4), (2, 1, 4, 48), (4, 2, 2, 4), (2, 4, 4, 8), (3, 3, 8, 4), (1, 2, 1, 1)]]
+    + [Jupiter(s, a) for s, a in [(4, 2), (8, 4), (16, 4), (32, 8), (64, 16)]]
+    + [Jupiter_bl(s, a) for s, a in [(4, 2), (8, 4), (16, 4), (32, 8), (256, 64)]]
+)
+
+
+def graph_links(G):
+    """Links of a generated graph as sorted (smaller ID, larger ID) pairs"""
+    edges = np.array(list(G.edges), dtype=np.int64).reshape(-1, 2)
+    return np.unique(np.sort(edges, axis=1), axis=0)
+
+
+@pytest.mark.parametrize("topology", TOPOLOGIES, ids=lambda topology: topology.descriptor)
+def test_gen_edges_matches_gen_graph(topology):
+    G = topology.gen_graph()
+    np.testing.assert_array_equal(topology.gen_edges(), graph_links(G))
+    # Every link exists in both directions
+    assert G.number_of_edges() == 2 * len(topology.gen_edges())
+    # The layers cover all switches of the graph
+    ids = np.arange(topology.indices[0][0], topology.indices[-1][-1] + 1)
+    assert sorted(G.nodes) == ids.tolist()
+
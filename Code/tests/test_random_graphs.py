@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from Topologies.fabric import Fabric
+from Topologies.fatTree import FatTree
+from Topologies.jupiter import Jupiter
+from Topologies.xpander import Xpander
+
+
+@pytest.mark.parametrize("topology", [Fabric(3, 2, 4, 8), FatTree(8), Jupiter(8, 4)], ids=lambda topology: topology.descriptor)
+@pytest.mark.parametrize("seed", [0, 1])
+def test_xpander_matches_link_count(topology, seed):
+    xpander = Xpander.matched_to(topology, seed=seed)
+    edges = xpander.gen_edges()
+    switch_count = topology.indices[-1][-1] + 1 - topology.indices[0][0]
+    assert xpander.indices[-1][-1] == switch_count
+    assert len(edges) == len(topology.gen_edges())
+    # Simple graph
+    assert np.all(edges[:, 0] < edges[:, 1])
+    assert len(np.unique(edges, axis=0)) == len(edges)
+    # The surplus links are spread: degrees differ by at most one
+    degrees = np.bincount(edges.ravel(), minlength=switch_count + 1)[1:]
+    assert degrees.max() - degrees.min() <= 1
+
+
+def test_xpander_link_count_out_of_range():
+    with pytest.raises(ValueError):
+        Xpander(4, 5, link_count=51)
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from Topologies.fabric import Fabric
+from Topologies.fatTree import FatTree
+from Topologies.jupiter import Jupiter
+from Topologies.routing import RoutingMatrix
+
+
+@pytest.mark.parametrize("topology", [FatTree(4), FatTree(8), Fabric(2, 1, 4, 8), Fabric(4, 2, 2, 4), Jupiter(8, 4)],
+                         ids=lambda topology: topology.descriptor)
+def test_ecmp_fractions_conserve_flow(topology):
+    routing = RoutingMatrix(topology)
+    links = routing.links
+    n = topology.indices[-1][-1]
+    t = routing.tor_count
+    tors = np.asarray(topology.indices[0])
+    # Switch x link incidence of the link sources and destinations
+    out_of = sp.csr_matrix((np.ones(len(links)), (links[:, 0] - 1, np.arange(len(links)))), shape=(n, len(links)))
+    into = sp.csr_matrix((np.ones(len(links)), (links[:, 1] - 1, np.arange(len(links)))), shape=(n, len(links)))
+    leaving = (out_of @ routing.matrix).toarray()
+    entering = (into @ routing.matrix).toarray()
+    assert routing.matrix.data.min() > 0 and routing.matrix.data.max() <= 1 + 1e-12
+
+    source, destination = np.divmod(np.arange(t * t), t)
+    pairs = source != destination
+    columns = np.arange(t * t)[pairs]
+    # Everything leaves the source ToR and arrives at the destination ToR
+    np.testing.assert_allclose(leaving[tors[source[pairs]] - 1, columns], 1.0)
+    np.testing.assert_allclose(entering[tors[destination[pairs]] - 1, columns], 1.0)
+    np.testing.assert_allclose(entering[tors[source[pairs]] - 1, columns], 0.0, atol=1e-12)
+    np.testing.assert_allclose(leaving[tors[destination[pairs]] - 1, columns], 0.0, atol=1e-12)
+    # Every other switch forwards what it receives
+    expected = np.zeros((n, t * t))
+    expected[tors[source[pairs]] - 1, columns] = 1.0
+    expected[tors[destination[pairs]] - 1, columns] = -1.0
+    np.testing.assert_allclose(leaving - entering, expected, atol=1e-12)
+    # Traffic of a ToR to itself is not routed
+    assert not routing.matrix[:, ~pairs].nnz
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from Topologies.fabric import Fabric
+from Topologies.fatTree import FatTree
+from Topologies.simulator import FlowSimulator, max_min_rates, poisson_workload, saturation_throughput
+
+
+def filling(paths, capacities):
+    """Reference progressive filling, one bottleneck link per round"""
+    rates = np.full(len(paths), np.inf)
+    active = {f for f in range(len(paths)) if any(l >= 0 for l in paths[f])}
+    residual = dict(enumerate(capacities))
+    level = 0.0
+    while active:
+        counts = {}
+        for f in active:
+            for l in paths[f]:
+                if l >= 0 and np.isfinite(capacities[l]):
+                    counts[l] = counts.get(l, 0) + 1
+        if not counts:
+            break
+        link = min(counts, key=lambda l: residual[l] / counts[l])
+        increment = residual[link] / counts[link]
+        level += increment
+        for l in counts:
+            residual[l] -= increment * counts[l]
+        for f in [f for f in active if link in paths[f]]:
+            rates[f] = level
+            active.remove(f)
+    return rates
+
+
+def test_unlimited_links_do_not_freeze_flows():
+    assert list(max_min_rates(np.array([[1], [0]]), np.array([2.0, np.inf]))) == [np.inf, 2.0]
+    assert list(max_min_rates(np.array([[0, 1], [1, -1], [-1, -1]]), np.array([1.0, np.inf]))) == [1.0, np.inf, np.inf]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_max_min_rates_match_progressive_filling(seed):
+    rng = np.random.default_rng(seed)
+    paths = rng.integers(-1, 12, (40, 4))
+    capacities = rng.uniform(0.5, 4.0, 12)
+    capacities[rng.integers(0, 12, 2)] = np.inf
+    assert np.allclose(max_min_rates(paths, capacities), filling(paths, capacities))
+
+
+def test_unlimited_capacity_function():
+    topo = Fabric(1, 0, nr_of_planes=2, port_count=4, capacity_function=lambda u, v: None if min(u, v) > 4 else 1.0)
+    completion_times = FlowSimulator(topo).run(*poisson_workload(topo, 50, load=0.3, seed=1))
+    assert np.all(np.isfinite(completion_times))
+
+
+def full_recomputation(sim, arrivals, sources, destinations, sizes):
+    """Reference simulation recomputing the rates of all active flows at every event"""
+    paths = sim.ecmp_paths(sources, destinations)
+    order = list(np.argsort(arrivals, kind='stable'))
+    finish = np.full(len(arrivals), np.nan)
+    active, remaining, now = [], np.zeros(0), 0.0
+    while order or active:
+        rates = max_min_rates(paths[active], sim.capacities)
+        with np.errstate(divide='ignore'):
+            departure = now + np.min(remaining / rates, initial=np.inf)
+        time = min(departure, arrivals[order[0]]) if order else departure
+        remaining = remaining - rates * (time - now)
+        now = time
+        if order and arrivals[order[0]] == time:
+            active.append(order.pop(0))
+            remaining = np.append(remaining, sizes[active[-1]])
+        else:
+            done = np.argmin(remaining / sizes[active])
+            finish[active.pop(done)] = now
+            remaining = np.delete(remaining, done)
+    return finish - arrivals
+
+
+@pytest.mark.parametrize("load", [0.3, 0.9, 2.0])
+def test_incremental_rates_match_full_recomputation(load):
+    topo = Fabric(2, 1, nr_of_planes=2, port_count=6)
+    workload = poisson_workload(topo, 300, load=load, size_distribution="pareto", seed=3)
+    sim = FlowSimulator(topo)
+    assert np.allclose(sim.run(*workload), full_recomputation(sim, *workload))
+
+
+def test_saturation_throughput():
+    # Non-blocking: uniform traffic fills the ToR uplinks first
+    assert np.isclose(saturation_throughput(FatTree(4)), 16)
+    # 16 uplinks per pod, 144 of the 191 other ToRs are in other pods
+    assert np.isclose(saturation_throughput(Fabric(4, 2)), 4 * 16 * 191 / 144)
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from Topologies import spectral
+from Topologies.fatTree import FatTree
+from Topologies.jellyfish import Jellyfish
+from Topologies.xpander import Xpander
+
+
+@pytest.mark.parametrize("topology", [FatTree(8), Jellyfish(200, 6, seed=1), Xpander(5, 40, seed=1)],
+                         ids=lambda topology: topology.descriptor)
+@pytest.mark.parametrize("method", ["auto", "lobpcg", "arpack"])
+def test_algebraic_connectivity_matches_dense(topology, method):
+    expected = np.linalg.eigvalsh(spectral.laplacian(topology).toarray())[1]
+    assert spectral.algebraic_connectivity(topology, method) == pytest.approx(expected, rel=1e-5)
+
+
+def test_cache_tells_methods_apart(monkeypatch):
+    topology = Jellyfish(60, 4, seed=2)
+    used = []
+    solve = spectral.smallest_nontrivial_eigenpair
+    monkeypatch.setattr(spectral, "smallest_nontrivial_eigenpair", lambda matrix, method: used.append(method) or solve(matrix, method))
+    spectral.fiedler(topology, "arpack")
+    spectral.fiedler(topology, "lobpcg")
+    spectral.fiedler(topology, "lobpcg")
+    assert used == ["arpack", "lobpcg"]